@@ -0,0 +1,231 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Benchmark suite for the psicret library.
+
+ Usage:
+	python benchmark.py [--sizes=1,100,10000] [--repeat=3] [--only=name]
+		[--json=results.json] [--compare=baseline.json] [--threshold=0.1]
+
+ Every benchmark is run once per batch size and the best of --repeat
+ runs is recorded as seconds per item.  Scalar benchmarks call the
+ function size times in a loop; vector benchmarks (vpsicret, when NumPy
+ is available) make one call on arrays of that size.
+
+ --json writes the results as JSON; --compare reads a previous --json
+ file and flags every timing more than --threshold (relative) slower,
+ exiting with status 1 if any regressed.
+ '''
+
+import os
+import sys
+import json
+import time
+import random
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','lib'))
+
+import metricsys as msys
+import arguments
+from psicret import psicret
+try:
+	import numpy as np
+	import vpsicret
+except ImportError:
+	np = None
+
+P = 101325.0
+benchmarks = []
+
+def benchmark(name, kind='scalar'):
+	'''Registers a benchmark: a function of the batch size that returns
+	the callable to time'''
+	def register(setup):
+		benchmarks.append((name, kind, setup))
+		return setup
+	return register
+
+def _states(size, seed=1):
+	rnd = random.Random(seed)
+	tdb = [rnd.uniform(-20.0,45.0) for i in range(size)]
+	rh = [rnd.uniform(0.05,1.0) for i in range(size)]
+	return tdb, rh
+
+def _scalar(name, fn, make):
+	@benchmark('psicret.'+name)
+	def setup(size):
+		tdb, rh = _states(size)
+		argv = [make(t,r) for t,r in zip(tdb,rh)]
+		def run():
+			for a in argv:
+				fn(*a)
+		return run
+
+_W = lambda t,r: psicret.W2(t,r,P)
+_scalar('Pws', psicret.Pws, lambda t,r: (t,))
+_scalar('dlnPws', psicret.dlnPws, lambda t,r: (t,))
+_scalar('dPws', psicret.dPws, lambda t,r: (t,))
+_scalar('Pw', psicret.Pw, lambda t,r: (P,_W(t,r)))
+_scalar('W', psicret.W, lambda t,r: (t,t-3*r,P))
+_scalar('W2', psicret.W2, lambda t,r: (t,r,P))
+_scalar('W3', psicret.W3, lambda t,r: (t,psicret.h(t,_W(t,r))))
+_scalar('RH', psicret.RH, lambda t,r: (t,t-3*r,P))
+_scalar('RH2', psicret.RH2, lambda t,r: (t,_W(t,r),P))
+_scalar('Twb', psicret.Twb, lambda t,r: (t,r,P))
+_scalar('h', psicret.h, lambda t,r: (t,_W(t,r)))
+_scalar('T', psicret.T, lambda t,r: (psicret.h(t,_W(t,r)),_W(t,r)))
+_scalar('T2', psicret.T2, lambda t,r: (t-3*r,_W(t,r),P))
+_scalar('T3', psicret.T3, lambda t,r: (psicret.Twb(t,r,P),r,P))
+_scalar('T4', psicret.T4, lambda t,r: (psicret.Twb(t,r,P),psicret.h(t,_W(t,r)),P))
+_scalar('T5', psicret.T5, lambda t,r: (r,_W(t,r),P))
+_scalar('T6', psicret.T6, lambda t,r: (r,psicret.h(t,_W(t,r)),P))
+_scalar('Dew', psicret.Dew, lambda t,r: (P,_W(t,r)))
+_scalar('Rda', psicret.Rda, lambda t,r: (P,t,_W(t,r)))
+_scalar('Sv', psicret.Sv, lambda t,r: (P,t,_W(t,r)))
+_scalar('Mad', psicret.Mad, lambda t,r: (P,t,_W(t,r)))
+_scalar('Dsat', psicret.Dsat, lambda t,r: (t,_W(t,r),P))
+_scalar('S', psicret.S, lambda t,r: (t,_W(t,r),P))
+
+def _solveall(known):
+	@benchmark('solveall.'+'+'.join(sorted(known)))
+	def setup(size):
+		tdb, rh = _states(size)
+		states = []
+		for t, r in zip(tdb,rh):
+			W = psicret.W2(t,r,P)
+			full = {'tdb': t, 'rh': r, 'W': W, 'h': psicret.h(t,W),
+				'twb': psicret.Twb(t,r,P), 'dew': psicret.Dew(P,W)}
+			states.append(dict((k, full[k]) for k in known))
+		def run():
+			for kwargs in states:
+				psicret(P=P,**kwargs).solveall()
+		return run
+
+for known in (('tdb','twb'),('tdb','dew'),('tdb','rh'),('tdb','h'),('tdb','W'),('h','W'),
+		('twb','rh'),('dew','rh'),('rh','h'),('twb','W'),('twb','h'),('dew','h'),
+		('dew','twb'),('rh','W')):
+	_solveall(known)
+
+@benchmark('metricsys.convert')
+def setup(size):
+	values = [random.uniform(0.0,100.0) for i in range(size)]
+	def run():
+		for v in values:
+			msys.convert('degF',v)
+	return run
+
+def _parse(name, compiled):
+	@benchmark(name)
+	def setup(size):
+		argv = ['psicret','-P','90000','--stream','--chunk=500','-E','20','free']
+		def run():
+			for i in range(size):
+				cli = arguments.args(arguments.HELP, compiled=compiled)
+				cli.rflags('stream')
+				cli.rkeys(pressure=None, elevation=None, chunk=None)
+				cli.ralias(P='pressure', E='elevation')
+				cli.parse(argv)
+		return run
+
+_parse('arguments.args.parse', False)
+_parse('arguments.args.parse.compiled', True)
+
+if np is not None:
+	def _vector(name, fn, make):
+		@benchmark('vpsicret.'+name,'vector')
+		def setup(size):
+			tdb = np.random.RandomState(1).uniform(-20.0,45.0,size)
+			rh = np.random.RandomState(2).uniform(0.05,1.0,size)
+			argv = make(tdb,rh)
+			return lambda: fn(*argv)
+
+	_vW = lambda t,r: vpsicret.W2(t,r,P)
+	_vector('Pws', vpsicret.Pws, lambda t,r: (t,))
+	_vector('W', vpsicret.W, lambda t,r: (t,t-3*r,P))
+	_vector('W2', vpsicret.W2, lambda t,r: (t,r,P))
+	_vector('RH2', vpsicret.RH2, lambda t,r: (t,_vW(t,r),P))
+	_vector('Twb', vpsicret.Twb, lambda t,r: (t,r,P))
+	_vector('h', vpsicret.h, lambda t,r: (t,_vW(t,r)))
+	_vector('T2', vpsicret.T2, lambda t,r: (t-3*r,_vW(t,r),P))
+	_vector('T3', vpsicret.T3, lambda t,r: (vpsicret.Twb(t,r,P),r,P))
+	_vector('T4', vpsicret.T4, lambda t,r: (vpsicret.Twb(t,r,P),vpsicret.h(t,_vW(t,r)),P))
+	_vector('T5', vpsicret.T5, lambda t,r: (r,_vW(t,r),P))
+	_vector('T6', vpsicret.T6, lambda t,r: (r,vpsicret.h(t,_vW(t,r)),P))
+	_vector('Dew', vpsicret.Dew, lambda t,r: (P,_vW(t,r)))
+	_vector('Rda', vpsicret.Rda, lambda t,r: (P,t,_vW(t,r)))
+	_vector('Dsat', vpsicret.Dsat, lambda t,r: (t,_vW(t,r),P))
+	_vector('S', vpsicret.S, lambda t,r: (t,_vW(t,r),P))
+	_vector('solve_table', vpsicret.solve_table,
+		lambda t,r: ({'tdb': t, 'rh': r, 'P': P},))
+
+	import dispatcher
+
+	@benchmark('dispatcher.submit','vector')
+	def setup(size):
+		tdb, rh = _states(size)
+		d = dispatcher.dispatcher()
+		def run():
+			futures = [d.submit(P=P,tdb=t,rh=r) for t, r in zip(tdb,rh)]
+			for f in futures:
+				f.result()
+		return run
+
+def run(sizes, repeat=3, only=None):
+	'''Returns {name: {size: seconds per item}}'''
+	results = {}
+	for name, kind, setup in benchmarks:
+		if only and only not in name: continue
+		timings = {}
+		for size in sizes:
+			try:
+				fn = setup(size)
+				best = None
+				for r in range(repeat):
+					start = time.time()
+					fn()
+					elapsed = time.time()-start
+					if best is None or elapsed < best: best = elapsed
+				timings[str(size)] = best/size
+			except Exception, e:
+				timings[str(size)] = None
+				sys.stderr.write('%s[%d]: %s\n' % (name,size,e))
+		results[name] = timings
+	return results
+
+def compare(results, baseline, threshold=0.1):
+	'''Returns the list of (name, size, base, new) that are more than
+	threshold slower than the baseline'''
+	regressions = []
+	for name, timings in sorted(results.items()):
+		for size, new in sorted(timings.items()):
+			base = baseline.get(name,{}).get(size)
+			if base and new and new > base*(1+threshold):
+				regressions.append((name,size,base,new))
+	return regressions
+
+def report(results, out=sys.stdout):
+	for name, timings in sorted(results.items()):
+		cells = ['%s: %s' % (size, t is None and 'error' or '%.3gus' % (t*1e6))
+			for size, t in sorted(timings.items(), key=lambda x: int(x[0]))]
+		out.write('%-32s %s\n' % (name, '  '.join(cells)))
+
+if __name__ == '__main__':
+	cli = arguments.args(arguments.HELP)
+	cli.rkeys(sizes=None, repeat=None, only=None, json=None, compare=None, threshold=None)
+	cli.parse()
+	sizes = [int(s) for s in cli.value('sizes',default='1,100,10000').split(',')]
+	results = run(sizes, int(cli.value('repeat',default=3)), cli.value('only'))
+	report(results)
+	if cli.value('json'):
+		with open(cli.value('json'),'w') as fp:
+			json.dump({'python': sys.version.split()[0], 'time': time.time(),
+				'sizes': sizes, 'results': results}, fp, indent=1, sort_keys=True)
+	if cli.value('compare'):
+		with open(cli.value('compare')) as fp:
+			baseline = json.load(fp)['results']
+		regressions = compare(results, baseline, float(cli.value('threshold',default=0.1)))
+		for name, size, base, new in regressions:
+			print 'REGRESSION %s[%s]: %.3gus -> %.3gus (%+.0f%%)' % (
+				name, size, base*1e6, new*1e6, 100*(new/base-1))
+		if regressions:
+			sys.exit(1)
@@ -0,0 +1,49 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Thin client of the psicret service (psicret.py --server --socket=path).
+
+	python psiclient.py [--socket=path] <psicret options>
+
+ Sends the options and prints the answer.  It imports nothing from the
+ library, so it starts in the time of a bare interpreter; Python callers
+ can keep a client instance and its connection open instead.
+ '''
+
+import os
+import sys
+import json
+import socket
+
+SOCKET = os.environ.get('PSICRET_SOCKET') or '/tmp/psicret-%d.sock' % os.getuid()
+
+class client:
+	def __init__(self, path=SOCKET):
+		self.__sock = socket.socket(socket.AF_UNIX,socket.SOCK_STREAM)
+		self.__sock.connect(path)
+		self.__in = self.__sock.makefile('rb')
+
+	def ask(self, argv):
+		'''The answer text to the command line arguments argv'''
+		self.__sock.sendall(json.dumps(list(argv))+'\n')
+		lines = []
+		for line in iter(self.__in.readline,''):
+			if line == '\n': break
+			lines.append(line)
+		return ''.join(lines)
+
+	def close(self):
+		self.__in.close()
+		self.__sock.close()
+
+if __name__ == '__main__':
+	argv = sys.argv[1:]
+	path = SOCKET
+	if argv and argv[0].startswith('--socket='):
+		path = argv.pop(0)[len('--socket='):]
+	conn = client(path)
+	text = conn.ask(argv)
+	conn.close()
+	sys.stdout.write(text)
+	sys.exit(text.startswith('error:') and 1 or 0)
@@ -5,8 +5,119 @@ import sys
 sys.path.insert(0,'../lib/')
 #from pprint import pprint
 
-from arguments import args
 from psicret import psicret
+import psiserver
+
+def stream(fin, fout, chunk=10000, delimiter=None, pressure=None, elevation=None, processes=None, threads=None):
+	'''Solves the CSV/TSV records read from fin and writes the derived
+	properties to fout, chunk rows at a time.  The first line names the
+	columns (tdb, twb, dew, rh, W, h, and optionally P or elevation, SI
+	units); the pressure argument is in kPa, like -P.  Empty fields are
+	unknown, empty lines are skipped and a bad record is reported on
+	stderr and written as NaN.  With processes > 1 every chunk is sharded
+	across a process pool, with threads > 1 across a thread pool.
+	'''
+	import re
+	import warnings
+	import itertools
+	import numpy as np
+	from vpsicret import OUTPUTS
+	if processes > 1:
+		import parallel
+		solve = lambda columns: parallel.solve_table(columns,processes)
+	elif threads > 1:
+		import parallel
+		solve = lambda columns: parallel.solve_table_threads(columns,threads)
+	else:
+		solve = psicret.solve_table
+
+	header = fin.readline()
+	if not header: return
+	if delimiter is None:
+		delimiter = '\t' in header and '\t' or ','
+	names = [name.strip() for name in header.split(delimiter)]
+	d = re.escape(delimiter)
+	empty = re.compile(r'(?m)(?:^|(?<=%s))(?=%s|\r?$)' % (d,d))
+	fixed = {}
+	if 'P' not in names and 'pressure' not in names and 'elevation' not in names:
+		if pressure is not None:
+			fixed['P'] = float(pressure)*1000.0
+		else:
+			fixed['elevation'] = elevation is not None and float(elevation) or 0.0
+	fout.write(delimiter.join(OUTPUTS)+'\n')
+	fmt = delimiter.join(['%.6g']*len(OUTPUTS))+'\n'
+	n = len(names)
+	line = 1
+	while True:
+		block = list(itertools.islice(fin,chunk))
+		if not block: break
+		numbers = [line+1+i for i, text in enumerate(block) if text.strip()]
+		records = [text.rstrip('\r\n') for text in block if text.strip()]
+		line+= len(block)
+		if not records: continue
+		text = empty.sub('nan','\n'.join(records)).replace('\n',delimiter)
+		with warnings.catch_warnings():
+			warnings.simplefilter('ignore')
+			data = np.fromstring(text,sep=delimiter)
+		if data.size != len(records)*n or [r for r in records if r.count(delimiter) != n-1]:
+			data = _records(records,numbers,n,delimiter)
+		data = data.reshape(-1,n)
+		columns = dict(fixed)
+		for i, name in enumerate(names):
+			columns[name] = data[:,i]
+		solved = solve(columns)
+		table = np.column_stack([solved[name] for name in OUTPUTS])
+		fout.write(fmt*len(table) % tuple(table.ravel()))
+		fout.flush()
+
+def _records(records, numbers, n, delimiter):
+	'''Parses the records one by one: a record without n numeric (or
+	empty) fields is reported on stderr and read as all NaN'''
+	import numpy as np
+	data = np.full((len(records),n),np.nan)
+	for row, (text, number) in enumerate(zip(records,numbers)):
+		fields = text.split(delimiter)
+		try:
+			if len(fields) != n: raise ValueError
+			data[row] = [f.strip() and f or 'nan' for f in fields]
+		except ValueError:
+			sys.stderr.write('psicret: line %d: bad record, written as NaN\n' % number)
+			data[row] = np.nan
+	return data
+
+cli = psiserver.parser()
+cli.rflags('stream','server')
+cli.rkeys(chunk=None, delimiter=None, processes=None, threads=None, socket=None, http=None)
+cli.parse()
+
+if cli.isset('stream'):
+	workers = max(int(cli.value('processes',default=1)),int(cli.value('threads',default=1)))
+	stream(sys.stdin, sys.stdout,
+		chunk=int(cli.value('chunk',default=10000*workers)),
+		delimiter=cli.value('delimiter'),
+		pressure=cli.value('pressure'),
+		elevation=cli.value('elevation'),
+		processes=int(cli.value('processes',default=1)),
+		threads=int(cli.value('threads',default=1)))
+	sys.exit(0)
+
+if cli.isset('server'):
+	path = cli.value('socket')
+	if path:
+		psiserver.listen(path is True and psiserver.SOCKET or path)
+	else:
+		psiserver.serve(sys.stdin, sys.stdout)
+	sys.exit(0)
+
+if cli.value('http'):
+	import psihttp
+	port = cli.value('http')
+	psihttp.run(('', port is True and psihttp.PORT or int(port)))
+	sys.exit(0)
+
+if psiserver.point(cli):
+	sys.stdout.write(psiserver.answer(sys.argv[1:]))
+	sys.exit(0)
 
 pp = psicret('imp',elevation=0,tdb=60,rh=.6)
 print pp.alpha()
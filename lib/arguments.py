@@ -37,13 +37,26 @@ VERSION = 0b0010
 
 from matcher import *
 
+# Characters matched by \w
+_WORD = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+
+def _isword(s):
+	for c in s:
+		if c not in _WORD:
+			return False
+	return s != ''
+
 class argException(Exception):
 	def __init__(self, missmatch):
 		print '>>>', missmatch, chr(10)
 		Exception.__init__(self,missmatch)
 
 class args:
-	def __init__(self, commons=0, ordered=False):
+	def __init__(self, commons=0, ordered=False, compiled=False):
+		'''compiled: parse through a lookup table built from the
+		registered flags, keys and aliases instead of regexes'''
+		self.__compiled = compiled
+		self.__table = None
 		self.__flags = set([])
 		self.__dict = {}
 		self.__alias = {}
@@ -59,10 +72,12 @@ class args:
 			
 		
 	def rflags(self, *args):
+		self.__table = None
 		for arg in args:
 			self.__flags.add(arg)
 	
 	def rkeys(self, **kwargs):
+		self.__table = None
 		for key, value in kwargs.iteritems():
 			self.__dict[key] = value
 		
@@ -95,6 +110,7 @@ class args:
 		return full in self.__flags
 
 	def ralias(self, **kwargs):
+		self.__table = None
 		for key, value in kwargs.iteritems():
 			k = str(key)
 			v = str(value)
@@ -106,6 +122,7 @@ class args:
 				raise argException('No propper alias pair "-{}" "--{}".'.format(key,value))
 		
 	def ordering(self, *args):
+		self.__table = None
 		self.__order = list(args)
 		
 	def __inorder(self, arg):
@@ -132,6 +149,8 @@ class args:
 		if argv is None:
 			import sys
 			argv = sys.argv
+		if self.__compiled:
+			return self.__cparse(argv,strict)
 		l = ''
 		single = matcher('^-(\w)$')
 		multiple = matcher('^-(\w+)$')
@@ -173,7 +192,74 @@ class args:
 				self.set(b)
 			else:
 				self.setfree(arg)
-	
+
+	def __entry(self, name, short, order=()):
+		'''(name, starts a group, is a key, is registered, default value)
+		of an argument, resolving the alias of short ones'''
+		if short:
+			name = self.__alias.get(name,name)
+		iskey = name in self.__dict
+		return (name, name in order, iskey, iskey or name in self.__flags,
+			iskey and self.__dict[name] or True)
+
+	def __compile(self):
+		order = isinstance(self.__order,list) and set(self.__order) or ()
+		shorts = {}
+		longs = {}
+		for name in self.__flags:
+			longs[name] = self.__entry(name,False,order)
+		for name in self.__dict:
+			longs[name] = self.__entry(name,False,order)
+		for short in self.__alias:
+			shorts[short] = self.__entry(short,True,order)
+		for name in longs:
+			if len(name) == 1 and name not in shorts:
+				shorts[name] = self.__entry(name,True,order)
+		self.__table = shorts, longs, order
+		return self.__table
+
+	def __cparse(self, argv, strict):
+		'''Same results as the regex parse, classifying every token by its
+		first characters and looking it up in the table'''
+		shorts, longs, order = self.__table or self.__compile()
+		tree = self.__args
+		top = tree[0]
+		l = None
+		for arg in argv:
+			if l is not None:
+				top[l] = arg
+				if len(tree) > 1: tree[-1][l] = arg
+				l = None
+				continue
+			if arg[:2] == '--':
+				eq = arg.find('=')
+				if eq < 0:
+					name, value = arg[2:], None
+				else:
+					name, value = arg[2:eq], arg[eq+1:].split('\n',1)[0]
+				if _isword(name):
+					entry = longs.get(name) or longs.setdefault(name,self.__entry(name,False,order))
+					if entry[1]:
+						tree.append({})
+					if value is None: value = entry[4]
+					top[name] = value
+					if len(tree) > 1: tree[-1][name] = value
+					continue
+			elif arg[:1] == '-' and _isword(arg[1:]):
+				for a in arg[1:]:
+					entry = shorts.get(a) or shorts.setdefault(a,self.__entry(a,True,order))
+					name = entry[0]
+					if entry[1]:
+						tree.append({})
+					if entry[2]:
+						l = name
+					elif strict and not entry[3]:
+						raise argException('Invalid argument "-{}"'.format(name))
+					top[name] = entry[4]
+					if len(tree) > 1: tree[-1][name] = entry[4]
+				continue
+			self.setfree(arg)
+
 	def isset(self, flag, index=0):
 		if flag not in self.__args[index].keys():
 			return False
@@ -0,0 +1,105 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Localized vocabulary of conf/bab-*.dic.
+
+ In the text sections ([ashrae], [mollier], ...) a '*' marks the letters
+ that are capitalized in titles: '*dry *bulb *temperature' reads
+ 'dry bulb temperature' in running text and 'Dry Bulb Temperature' as a
+ title.  In [units] every entry is symbol,singular,plural.
+
+ load() compiles a dictionary once: the result is marshalled next to the
+ source (bab-en.dic -> bab-en.dicc) and kept in memory, and both copies
+ are rebuilt whenever the source file changes.
+
+	en = load('en')
+	en.text('ashrae','dbt')           'dry bulb temperature'
+	en.text('ashrae','dbt',True)      'Dry Bulb Temperature'
+	en.unit('m',2)                    'meters'
+ '''
+
+import os
+import re
+import marshal
+import ConfigParser
+
+CONF = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','conf')
+# Bump whenever the compiled layout changes
+VERSION = 1
+
+_loaded = {}
+_marker = re.compile(r'\*(.)')
+
+def _compile(path):
+	cp = ConfigParser.RawConfigParser()
+	cp.optionxform = str
+	cp.read(path)
+	sections = {}
+	units = {}
+	for section in cp.sections():
+		if section == 'units':
+			for key, value in cp.items(section):
+				forms = value.split(',')
+				forms+= forms[-1:]*(3-len(forms))
+				units[key] = tuple(forms[:3])
+		else:
+			sections[section] = dict((key, (_marker.sub(r'\1',value),
+				_marker.sub(lambda m: m.group(1).upper(),value)))
+				for key, value in cp.items(section))
+	return {'sections': sections, 'units': units}
+
+def load(lang='en', path=None):
+	'''The catalog of conf/bab-lang.dic (or of the file at path)'''
+	if path is None:
+		path = os.path.join(CONF,'bab-%s.dic' % lang)
+	st = os.stat(path)
+	stamp = (VERSION,st.st_mtime,st.st_size)
+	if path in _loaded and _loaded[path][0] == stamp:
+		return _loaded[path][1]
+	data = None
+	try:
+		with open(path+'c','rb') as fp:
+			cached = marshal.load(fp)
+		if cached.get('stamp') == stamp:
+			data = cached
+	except (IOError, EOFError, ValueError, TypeError):
+		pass
+	if data is None:
+		data = _compile(path)
+		data['stamp'] = stamp
+		try:
+			tmp = '%s.%d' % (path+'c',os.getpid())
+			with open(tmp,'wb') as fp:
+				marshal.dump(data,fp)
+			os.rename(tmp,path+'c')
+		except (IOError, OSError):
+			pass
+	result = catalog(data)
+	_loaded[path] = stamp, result
+	return result
+
+class catalog:
+	def __init__(self, data):
+		self.__sections = data['sections']
+		self.__units = data['units']
+
+	def text(self, section, key, title=False, default=''):
+		'''The entry key of section, in title case if title'''
+		entry = self.__sections.get(section,{}).get(key)
+		if entry is None: return default
+		return entry[title and 1 or 0]
+
+	def section(self, name, title=False):
+		'''All the entries of a section, as a dict'''
+		i = title and 1 or 0
+		return dict((key, entry[i]) for key, entry in self.__sections.get(name,{}).items())
+
+	def unit(self, key, count=None):
+		'''The symbol of the unit, or its name for count units'''
+		forms = self.__units[key]
+		if count is None: return forms[0]
+		return forms[abs(count) == 1 and 1 or 2]
+
+	def units(self):
+		return self.__units.keys()
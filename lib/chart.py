@@ -0,0 +1,300 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Psychrometric chart rendering (SVG).
+
+ A chart is fixed by its pressure, kind (ashrae or mollier), page format
+ (conf/fmt-*.par) and language (conf/bab-*.dic).  Its static background
+ (saturation curve, relative humidity, wet bulb, enthalpy and specific
+ volume lines, grid, axes and titles) is computed as arrays, one family
+ of lines at a time, rendered once and cached on disk, so render() only
+ has to draw the state points over it.  Output goes through
+ svgout.svg_writer, straight to the file handle.
+
+	c = chart(P=101325.0, kind='ashrae', fmt='a4', lang='es')
+	with open('chart.svg','w') as out:
+		c.render(out, tdb=[20.0, 25.0], W=[0.008, 0.010])
+
+ For long series, pass chunks, an iterable of (tdb, W) arrays: only one
+ chunk at a time is held in memory.  With bins, states are counted on a
+ grid over the chart axes, (tdb, W) or (W, h - 2501·W), and drawn as
+ shaded cells instead of markers.
+
+ The ASHRAE chart plots W against tdb.  The Mollier (i-x) chart plots
+ h - 2501·W = (1.006 + 1.86·W)·tdb against W, that is enthalpy on axes
+ skewed so that the 0°C isotherm is level; it is drawn in portrait.
+ SI units only.
+
+ Backgrounds are kept in CACHE (the PSICRET_CACHE environment variable,
+ or a directory under the system temporary directory), one file per
+ chart; the key includes the modification times of the format and
+ language files, and VERSION.
+ '''
+
+import os
+import hashlib
+import itertools
+import tempfile
+import numpy as np
+import vpsicret
+import catalog
+from svgout import CONF, page_format, svg_writer
+
+CACHE = os.environ.get('PSICRET_CACHE') or os.path.join(tempfile.gettempdir(),'psicret-cache')
+# Bump whenever the drawing of the background changes
+VERSION = 2
+
+R = 287.055
+# Room [px] for the scales and titles around the plot, inside the margins
+PAD = 50
+# Default size [px] of the cells of density plots
+CELL = 6
+
+def _segments(x, y, keep):
+	'''Splits a polyline into the runs of points where keep holds'''
+	edges = np.flatnonzero(np.diff(np.concatenate(([0],keep.astype(int),[0]))))
+	return [(x[a:b], y[a:b]) for a, b in zip(edges[::2],edges[1::2]) if b-a > 1]
+
+def _steps(lo, hi, step):
+	return np.arange(np.ceil(lo/step), np.floor(hi/step)+1)*step
+
+class chart:
+	def __init__(self, P=101325.0, kind='ashrae', fmt='default', lang='en',
+			tmin=-10.0, tmax=50.0, wmax=0.030):
+		'''P: air pressure [Pa]
+		kind: ashrae or mollier
+		fmt, lang: names of the conf/fmt-*.par and conf/bab-*.dic files
+		tmin, tmax: dry bulb range [°C]
+		wmax: top of the humidity ratio range [kg/kg]'''
+		assert kind in ('ashrae','mollier'), 'Unknown chart kind %r' % kind
+		self.P = float(P)
+		self.kind = kind
+		self.fmt = fmt
+		self.lang = lang
+		self.tmin, self.tmax, self.wmax = float(tmin), float(tmax), float(wmax)
+		page = page_format(fmt)
+		if kind == 'mollier':
+			page['width'], page['height'] = page['height'], page['width']
+		self.page = page
+		self.__lines = None
+
+	def xy(self, T, W):
+		'''Chart coordinates of states given by tdb [°C] and W [kg/kg]'''
+		T = np.asarray(T,dtype=float)
+		W = np.asarray(W,dtype=float)
+		if self.kind == 'ashrae':
+			return T, W
+		return W, (1.006+1.86*W)*T
+
+	def box(self):
+		'''Chart coordinate ranges ((xmin, xmax), (ymin, ymax))'''
+		if self.kind == 'ashrae':
+			return (self.tmin,self.tmax), (0.0,self.wmax)
+		return (0.0,self.wmax), (1.006*self.tmin,1.006*self.tmax)
+
+	def topage(self, x, y):
+		'''Page coordinates [px] of chart coordinates'''
+		(x0,x1), (y0,y1) = self.box()
+		m = self.page['margins']+PAD
+		w, h = self.page['width']-2*m, self.page['height']-2*m
+		return m + (x-x0)*w/(x1-x0), m + (y1-y)*h/(y1-y0)
+
+	def __family(self, T, W):
+		'''Clipped polylines in chart coordinates of rows of states'''
+		x, y = self.xy(T,W)
+		(x0,x1), (y0,y1) = self.box()
+		with np.errstate(invalid='ignore'):
+			keep = (x>=x0-1e-9) & (x<=x1+1e-9) & (y>=y0-1e-9) & (y<=y1+1e-9)
+		return [_segments(x[i],y[i],keep[i]) for i in range(len(x))]
+
+	def lines(self):
+		'''{layer: [(value, [(x, y), ...]), ...]}: the background lines as
+		polylines in chart coordinates, clipped to the chart'''
+		if self.__lines is not None: return self.__lines
+		P, tmin, tmax, wmax = self.P, self.tmin, self.tmax, self.wmax
+		u = np.linspace(0.0,1.0,121)[None,:]
+		T = tmin + u*(tmax-tmin)
+		lines = {}
+		with np.errstate(invalid='ignore',divide='ignore'):
+			Ws = vpsicret.W2(T,1.0,P)
+			lines['saturation'] = [None], T, Ws
+
+			rh = np.arange(1,10)[:,None]*0.1
+			lines['rh'] = rh[:,0], T, vpsicret.W2(T,rh,P)
+
+			Tw = _steps(tmin,vpsicret.T5(1.0,wmax,P),2.0)[:,None]
+			Tl = Tw + u*(vpsicret.T2(Tw,0.0,P)-Tw)
+			lines['twb'] = Tw[:,0], Tl, vpsicret.W(Tl,Tw,P)
+
+			h = _steps(vpsicret.h(tmin,0.0),vpsicret.h(tmax,wmax),10.0)[:,None]
+			Tl = vpsicret.T6(1.0,h,P)
+			Tl = Tl + u*(h/1.006-Tl)
+			lines['h'] = h[:,0], Tl, vpsicret.W3(Tl,h)
+
+			sv = _steps(R*(tmin+273.15)/P,R*(tmax+273.15)*(1+wmax/0.62198)/P,0.01)[:,None]
+			Wl = 0.62198*(sv*P/(R*(T+273.15))-1)
+			Wl[Wl > Ws] = np.nan
+			lines['sv'] = sv[:,0], T, Wl
+
+			Tg = _steps(tmin,tmax,5.0)[:,None]
+			lines['tdb'] = Tg[:,0], Tg+0*u, u*np.minimum(vpsicret.W2(Tg,1.0,P),wmax)
+
+			Wg = _steps(0.0,wmax,0.005)[:,None]
+			Tl = np.fmax(vpsicret.T5(1.0,Wg,P),tmin)
+			Tl = Tl + u*(tmax-Tl)
+			lines['W'] = Wg[:,0], Tl, Wg+0*u
+
+		for name, (values, Tl, Wl) in lines.items():
+			Tl, Wl = np.broadcast_arrays(np.atleast_2d(Tl),np.atleast_2d(Wl))
+			lines[name] = zip(values,self.__family(Tl,Wl))
+		self.__lines = lines
+		return lines
+
+	def key(self):
+		'''Name of the cached background file'''
+		stamps = []
+		for name in ('fmt-%s.par' % self.fmt,'bab-%s.dic' % self.lang):
+			try: stamps.append(os.path.getmtime(os.path.join(CONF,name)))
+			except OSError: stamps.append(None)
+		key = repr((VERSION,round(self.P),self.kind,self.fmt,self.lang,
+			self.tmin,self.tmax,self.wmax,stamps))
+		return 'bg-%s.svg' % hashlib.sha1(key).hexdigest()
+
+	def background(self, svg):
+		"""Writes the static background to the svg_writer, from the disk
+		cache, drawing it there first if needed"""
+		path = os.path.join(CACHE,self.key())
+		if not os.path.exists(path):
+			try:
+				if not os.path.isdir(CACHE): os.makedirs(CACHE)
+				tmp = '%s.%d' % (path,os.getpid())
+				with open(tmp,'w') as fp:
+					self.draw(svg_writer(fp))
+				os.rename(tmp,path)
+			except (IOError, OSError):
+				self.draw(svg)
+				return
+		with open(path) as fp:
+			svg.copy(fp)
+
+	def draw(self, svg):
+		"""Draws the static background to the svg_writer"""
+		text = catalog.load(self.lang)
+		titles = text.section('ashrae',True)
+		titles.update(text.section(self.kind,True))
+		svg.style('.saturation{stroke:#000;stroke-width:1.5}.rh{stroke:#36c}'
+			'.twb{stroke:#393;stroke-dasharray:4,2}.h{stroke:#c33}.sv{stroke:#999}'
+			'.tdb,.W{stroke:#ccc;stroke-width:0.5}polyline{fill:none}'
+			'text{font-family:sans-serif;font-size:10px}')
+		for name in ('tdb','W','sv','h','twb','rh','saturation'):
+			svg.group(class_=name)
+			for value, segments in self.lines()[name]:
+				for x, y in segments:
+					svg.polyline(*self.topage(x,y))
+			svg.endgroup()
+		svg.group(class_='labels')
+		def label(x, y, text, anchor='middle', dx=0, dy=0):
+			px, py = self.topage(x,y)
+			svg.text(px+dx,py+dy,text,anchor)
+		for value, segments in self.lines()['rh']:
+			if segments:
+				x, y = segments[-1]
+				label(x[-1],y[-1],'%d%%' % round(100*value),'end',-2,-2)
+		for value, segments in self.lines()['h']:
+			if segments:
+				x, y = segments[0]
+				label(x[0],y[0],'%g' % value,'end',-2,-2)
+		(x0,x1), (y0,y1) = self.box()
+		if self.kind == 'ashrae':
+			for T in _steps(self.tmin,self.tmax,5.0):
+				label(T,y0,'%g' % T,dy=12)
+			for W in _steps(0.0,self.wmax,0.005):
+				label(x1,W,'%g' % W,'start',4,3)
+			xlabel, ylabel = titles.get('dbt',''), titles.get('omega','')
+		else:
+			for W in _steps(0.0,self.wmax,0.005):
+				label(W,y0,'%g' % W,dy=12)
+			for T in _steps(self.tmin,self.tmax,5.0):
+				label(x0,1.006*T,'%g' % T,'end',-4,3)
+			xlabel, ylabel = titles.get('omega',''), titles.get('dbt','')
+		m = self.page['margins']+PAD
+		label((x0+x1)/2,y0,xlabel,dy=26)
+		px, py = self.topage(x1,(y0+y1)/2)
+		svg.text(px+40,py,ylabel,transform='rotate(-90 %.1f %.1f)' % (px+40,py))
+		svg.text(m,m-16,titles.get('title',''),'start',font_size=16)
+		svg.endgroup()
+
+	def grid(self, bins=None):
+		'''(nx, ny) cells of the density grid; bins is a cell count, a
+		pair of them, or None for cells of about CELL px'''
+		if bins is None:
+			m = self.page['margins']+PAD
+			return (max(1,int((self.page['width']-2*m)/CELL)),
+				max(1,int((self.page['height']-2*m)/CELL)))
+		if isinstance(bins,int): return bins, bins
+		return tuple(bins)
+
+	def density(self, chunks, bins=None):
+		"""
+		output: array [nx, ny] of the number of states in each cell of
+			the grid over the chart
+		input:
+			chunks: iterable of (tdb [°C], W [kg/kg]) arrays
+			bins: see grid()
+		"""
+		nx, ny = self.grid(bins)
+		box = self.box()
+		counts = np.zeros((nx,ny))
+		for T, W in chunks:
+			x, y = self.xy(T,W)
+			x, y = x.ravel(), y.ravel()
+			ok = np.isfinite(x) & np.isfinite(y)
+			counts+= np.histogram2d(x[ok],y[ok],bins=(nx,ny),range=box)[0]
+		return counts
+
+	def __cells(self, svg, counts):
+		nx, ny = counts.shape
+		(x0,x1), (y0,y1) = self.box()
+		i, j = np.nonzero(counts)
+		if not i.size: return
+		px, py = self.topage(x0+i*(x1-x0)/nx,y0+(j+1)*(y1-y0)/ny)
+		level = np.log1p(counts[i,j])/np.log1p(counts.max())
+		shade = (230*(1-level)).astype(int)
+		fill = ['#ff%02x%02x' % (c,c) for c in shade]
+		m = self.page['margins']+PAD
+		w = (self.page['width']-2*m)/nx
+		h = (self.page['height']-2*m)/ny
+		svg.group(class_='density',fill_opacity=0.8)
+		svg.rects(px,py,w,h,fill)
+		svg.endgroup()
+		svg.text(self.page['width']-m,self.page['height']-m+40,
+			'max %d per cell' % counts.max(),'end')
+
+	def render(self, out, tdb=(), W=(), title=None, chunks=(), density=False, bins=None):
+		"""Writes to out the chart with the states (tdb [°C], W [kg/kg])
+		marked over the background.  chunks is an iterable of further
+		(tdb, W) arrays, e.g. a generator reading a file, that are
+		written as they come.  With density, the states are binned on
+		the grid given by bins (see grid()) and drawn as shaded cells, so
+		the output size depends on the grid, not on the sample count."""
+		svg = svg_writer(out)
+		width, height = self.page['width'], self.page['height']
+		svg.begin(width,height)
+		svg.rect(0,0,width,height,fill='#fff')
+		self.background(svg)
+		if title:
+			m = self.page['margins']+PAD
+			svg.text(width-m,m-16,title,'end')
+		states = itertools.chain([(tdb,W)],chunks)
+		if density:
+			self.__cells(svg,self.density(states,bins))
+			svg.end()
+			return
+		(x0,x1), (y0,y1) = self.box()
+		svg.group(class_='states',fill='#c00')
+		for T, W in states:
+			x, y = self.xy(T,W)
+			keep = (x>=x0) & (x<=x1) & (y>=y0) & (y<=y1)
+			svg.circles(*self.topage(x[keep],y[keep]))
+		svg.end()
@@ -0,0 +1,190 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Micro-batching of single-state solves.
+
+ A dispatcher takes the states submitted from any number of threads,
+ groups them by the set of properties they know and by pressure, and
+ solves every group as one vpsicret.solve_table call on its own thread.
+ A group is solved once it holds max_batch states or once its oldest
+ state has waited max_wait seconds; each caller gets a future of its
+ solved_state.
+
+	d = dispatcher(max_batch=1024, max_wait=0.002)
+	f = d.submit('imp', elevation=0, tdb=60, rh=.6)
+	state = f.result()
+
+ Installed with psicret.set_dispatcher(d), it also serves every
+ psicret.solveall() of an instance without its own pws, so unmodified
+ per-state callers are batched too.  A solve then waits up to max_wait
+ for company, which only pays off with many concurrent callers.
+ Results agree with the scalar path within the solver accuracy.
+ '''
+
+import time
+import thread
+import threading
+import collections
+import numpy as np
+import vpsicret
+from psicret import psicret, solved_state, PROPERTIES, UNSOLVABLE
+
+_FIELDS = solved_state.__slots__
+_TDB = _FIELDS.index('tdb')
+_W = _FIELDS.index('W')
+
+class future:
+	'''Pending result of a submitted solve'''
+	def __init__(self):
+		self.__lock = thread.allocate_lock()
+		self.__lock.acquire()
+		self.__result = None
+		self.__error = None
+
+	def done(self):
+		return not self.__lock.locked()
+
+	def __wait(self, timeout):
+		if timeout is None:
+			self.__lock.acquire()
+			self.__lock.release()
+			return
+		end = time.time()+timeout
+		delay = 0.0005
+		while self.__lock.locked():
+			remaining = end-time.time()
+			if remaining <= 0:
+				raise RuntimeError('Solve not finished after %s s' % timeout)
+			time.sleep(min(delay,remaining))
+			delay = min(2*delay,0.05)
+
+	def result(self, timeout=None):
+		'''The solved_state, waiting at most timeout seconds (None: for
+		ever); raises the error of the solve, or RuntimeError on timeout'''
+		self.__wait(timeout)
+		if self.__error is not None:
+			raise self.__error
+		return self.__result
+
+	def exception(self, timeout=None):
+		self.__wait(timeout)
+		return self.__error
+
+	def _resolve(self, result, error=None):
+		self.__result = result
+		self.__error = error
+		self.__lock.release()
+
+class dispatcher:
+	def __init__(self, max_batch=1024, max_wait=0.002, pws=None):
+		'''max_batch: most states per vector solve
+		max_wait: [s] longest a state waits for others to batch with
+		pws: saturation pressure backend, e.g. pws_table.vector'''
+		self.max_batch = max_batch
+		self.max_wait = max_wait
+		self.pws = pws
+		self.__queue = collections.deque()
+		self.__pending = {}
+		self.__lock = threading.Lock()
+		self.__wake = threading.Event()
+		self.__idle = False
+		self.__thread = threading.Thread(target=self.__run,name='psicret-dispatcher')
+		self.__thread.daemon = True
+		self.__thread.start()
+
+	def submit(self, system='si', **kwargs):
+		'''Queues the state of psicret(system, **kwargs); returns a future'''
+		return self.submit_state(psicret(system,**kwargs).state())
+
+	def submit_state(self, state):
+		'''Queues a solved_state holding the known properties (SI, None
+		where unknown) and P; returns a future'''
+		f = future()
+		known = frozenset(name for name in PROPERTIES if getattr(state,name) is not None)
+		if not psicret.sufficient(known):
+			missing = [p for p in PROPERTIES if not psicret.sufficient(known,p)]
+			f._resolve(None,AssertionError(UNSOLVABLE[missing[0]]))
+		else:
+			self.__put(((known,state.P),state,f),(known,state.P))
+		return f
+
+	def solve(self, system='si', **kwargs):
+		'''Solves the state of psicret(system, **kwargs), waiting for it'''
+		return self.submit(system,**kwargs).result()
+
+	def close(self):
+		'''Solves what is queued and stops the dispatcher thread'''
+		self.__put(None)
+		self.__thread.join()
+
+	def __put(self, item, key=None):
+		'''Queues item; wakes the dispatcher thread when it is idle, when
+		closing, or when the group of key holds max_batch states'''
+		full = False
+		if key is not None:
+			with self.__lock:
+				n = self.__pending.get(key,0)+1
+				self.__pending[key] = n
+			full = n >= self.max_batch
+		self.__queue.append(item)
+		if item is None or full or self.__idle:
+			self.__wake.set()
+
+	def __run(self):
+		groups = {}
+		closing = False
+		while not closing or groups:
+			timeout = None
+			if groups:
+				timeout = max(0.0,min(due for due, items in groups.values())-time.time())
+			if timeout is None:
+				self.__idle = True
+				if not self.__queue:
+					self.__wake.wait()
+					self.__wake.clear()
+				self.__idle = False
+			elif timeout > 0:
+				self.__wake.wait(timeout)
+				self.__wake.clear()
+			items = []
+			while self.__queue:
+				items.append(self.__queue.popleft())
+			for item in items:
+				if item is None:
+					closing = True
+					continue
+				key, state, f = item
+				if key not in groups:
+					groups[key] = time.time()+self.max_wait, []
+				groups[key][1].append((state,f))
+			now = time.time()
+			for key, (due, batch) in groups.items():
+				if closing or due <= now or len(batch) >= self.max_batch:
+					del groups[key]
+					with self.__lock:
+						n = self.__pending.get(key,0)-len(batch)
+						if n > 0: self.__pending[key] = n
+						else: self.__pending.pop(key,None)
+					for i in range(0,len(batch),self.max_batch):
+						self.__solve(key,batch[i:i+self.max_batch])
+
+	def __solve(self, key, batch):
+		known, P = key
+		columns = {'P': P}
+		for name in known:
+			columns[name] = np.array([getattr(state,name) for state, f in batch])
+		try:
+			solved = vpsicret.solve_table(columns,self.pws)
+			rows = np.column_stack([solved[name] for name in _FIELDS]).tolist()
+		except Exception, e:
+			for state, f in batch:
+				f._resolve(None,e)
+			return
+		for (state, f), row in zip(batch,rows):
+			if row[_W] < 0:
+				f._resolve(None,AssertionError('Humidity ratio is negative'))
+			elif row[_W] != row[_W] or row[_TDB] != row[_TDB]:
+				f._resolve(None,ValueError('No solution for the given state'))
+			else:
+				f._resolve(solved_state(*row))
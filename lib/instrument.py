@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Instrumentation probes for the psicret solver.
+
+ A probe is any object with the three methods below; psicret.set_probe()
+ installs one.  With no probe installed (the default) the solver runs its
+ plain, unwrapped methods and only tests one global per derivation
+ step and per Twb call.
+
+	step(name, seconds)       a solver step (solve_W, solve_twb, ...) ran
+	count(name, n=1)          an event happened (a Pws evaluation, the
+	                          derivation branch taken by a step, ...)
+	iterations(name, n, residual, inputs)
+	                          an iterative solver finished after n
+	                          iterations with the given final residual
+
+ collector is the stock probe: it aggregates everything into log2
+ histograms and keeps the inputs of the costliest iterative solves.
+
+	probe = collector()
+	psicret.set_probe(probe)
+	...
+	psicret.set_probe(None)
+	probe.dump()
+ '''
+
+import sys
+import math
+import heapq
+
+_OVERFLOW = 'nan/inf'
+_INF = float('inf')
+
+def _bucket(value):
+	if value != value or value in (_INF,-_INF): return _OVERFLOW
+	if value <= 0: return None
+	return int(math.floor(math.log(value,2)))
+
+class histogram:
+	def __init__(self):
+		self.n = 0
+		self.total = 0.0
+		self.min = None
+		self.max = None
+		self.buckets = {}
+
+	def add(self, value):
+		'''Non-finite values are only counted, in their own bucket'''
+		self.n += 1
+		b = _bucket(value)
+		self.buckets[b] = self.buckets.get(b,0)+1
+		if b == _OVERFLOW: return
+		self.total += value
+		if self.min is None or value < self.min: self.min = value
+		if self.max is None or value > self.max: self.max = value
+
+	def mean(self):
+		n = self.n-self.buckets.get(_OVERFLOW,0)
+		return n and self.total/n or 0.0
+
+	def alpha(self, scale=1.0, unit=''):
+		lines = ['  n=%d mean=%.4g%s min=%.4g%s max=%.4g%s' % (self.n,
+			self.mean()*scale, unit, (self.min or 0)*scale, unit,
+			(self.max or 0)*scale, unit)]
+		width = max(self.buckets.values() or [1])
+		for b in sorted(self.buckets.keys()):
+			if b is None: label = '0'
+			elif b == _OVERFLOW: label = b
+			else: label = '<%.4g%s' % (2.0**(b+1)*scale,unit)
+			count = self.buckets[b]
+			lines.append('  %12s %8d %s' % (label, count, '#'*(40*count//width)))
+		return '\n'.join(lines)
+
+class collector:
+	def __init__(self, worst=10):
+		'''worst: how many of the costliest iterative solves to keep'''
+		self.steps = {}
+		self.counts = {}
+		self.iters = {}
+		self.residuals = {}
+		self.__worst = worst
+		self.worst = {}
+
+	def step(self, name, seconds):
+		if name not in self.steps:
+			self.steps[name] = histogram()
+		self.steps[name].add(seconds)
+
+	def count(self, name, n=1):
+		self.counts[name] = self.counts.get(name,0)+n
+
+	def iterations(self, name, n, residual, inputs=None):
+		if name not in self.iters:
+			self.iters[name] = histogram()
+			self.residuals[name] = histogram()
+			self.worst[name] = []
+		self.iters[name].add(n)
+		self.residuals[name].add(abs(residual))
+		heap = self.worst[name]
+		if len(heap) < self.__worst:
+			heapq.heappush(heap,(n,inputs))
+		elif n > heap[0][0]:
+			heapq.heapreplace(heap,(n,inputs))
+
+	def dump(self, out=sys.stdout):
+		for name in sorted(self.steps):
+			out.write('step %s\n%s\n' % (name, self.steps[name].alpha(1e6,'us')))
+		for name in sorted(self.iters):
+			out.write('iterations %s\n%s\n' % (name, self.iters[name].alpha()))
+			out.write('residual %s\n%s\n' % (name, self.residuals[name].alpha()))
+			for n, inputs in sorted(self.worst[name],reverse=True):
+				out.write('  worst: %d iterations for %r\n' % (n,inputs))
+		for name in sorted(self.counts):
+			out.write('count %s: %d\n' % (name, self.counts[name]))
@@ -4,14 +4,31 @@
 systems = {}
 aliases = {}
 units = {}
+plans = {}
+# Once frozen (see freeze) the registries only change by plan caching
+_frozen = False
+
+def freeze():
+	'''Forbids new systems and units from now on, so the registries can be
+	read from any thread without locking; the conversion plan caches only
+	ever gain entries, each computed identically by whichever thread gets
+	there first.'''
+	global _frozen
+	_frozen = True
+
+def frozen():
+	return _frozen
 
 class metric_system:
 	def __init__(self,name):
+		assert not _frozen, 'Cannot add system "%s": the registries are frozen'%name
 		aliases[name] = self
 		self.__units={}
 		self.__mainunit={}
+		self.__plans={}
 		
 	def addunit(self,name,dimension=None,factor=1.0,**kwargs):
+		assert not _frozen, 'Cannot add unit "%s": the registries are frozen'%name
 		if dimension is None:
 			unit = si.unit(name)
 			dimension = unit.dimension()
@@ -31,35 +48,52 @@ class metric_system:
 	
 	def tosi(self,dimension,value,orig=None,target=None):
 		if orig is None:
-			if self==si and target is None: return value
-			orig = self.main_unit(dimension)
+			if self is si and target is None: return value
+			fn = self.__plans.get((dimension,target))
+			if fn is None: fn = self.plan(dimension,target)
+			return fn(value)
 		return convert(orig,value,target)
+
+	def plan(self,dimension,target=None):
+		'''Compiled conversion from this system's main unit for dimension
+		to target (a unit or unit name; None for SI)'''
+		key = (dimension,target)
+		if key not in self.__plans:
+			self.__plans[key] = plan(self.main_unit(dimension),target)
+		return self.__plans[key]
+
+	def clear_plans(self):
+		self.__plans.clear()
 	
-	def alpha(self,name,value,fmt=None):
-		if name in self.__mainunit.keys():
-			unit = self.__mainunit[name]
-		elif name in self.__units.keys():
-			unit = self.__units[name]
+	def __lookup(self,name):
+		if name in self.__mainunit:
+			return self.__mainunit[name]
+		elif name in self.__units:
+			return self.__units[name]
 		elif isinstance(name,metric_unit):
-			unit = name
-		else:
-			return None
-		return unit.alpha(value,fmt)
+			return name
+		return None
+
+	def alpha(self,name,value,fmt=None):
+		unit = self.__lookup(name)
+		return unit and unit.alpha(value,fmt)
 	
 	def alpha_si(self,name,value,fmt=None):
-		if name in self.__mainunit.keys():
-			unit = self.__mainunit[name]
-		elif name in self.__units.keys():
-			unit = self.__units[name]
-		elif isinstance(name,metric_unit):
-			unit = name
-		else:
-			return None
-		return unit.alpha_si(value,fmt)
+		unit = self.__lookup(name)
+		return unit and unit.alpha_si(value,fmt)
+
+	def alpha_column(self,name,values,fmt=None,sep=None):
+		unit = self.__lookup(name)
+		return unit and unit.alpha_column(values,fmt,sep)
+
+	def alpha_si_column(self,name,values,fmt=None,sep=None):
+		unit = self.__lookup(name)
+		return unit and unit.alpha_si_column(values,fmt,sep)
 
 
 class metric_unit:
 	def __init__(self,name,dimension,factor=1.0,**kwargs):
+		assert not _frozen, 'Cannot add unit "%s": the registries are frozen'%name
 		self.__name = name
 		self.__dimension = dimension
 		self.__factor = factor
@@ -69,6 +103,9 @@ class metric_unit:
 		self.__fmt = kwargs.pop('fmt',"%f %s")
 		assert len(kwargs) == 0, "unrecognized params passed in: %s" % ",".join(kwargs.keys())
 		units[name] = self
+		plans.clear()
+		for system in aliases.values():
+			system.clear_plans()
 
 	def name(self):
 		return self.__name
@@ -76,19 +113,15 @@ class metric_unit:
 	def dimension(self):
 		return self.__dimension
 		
+	def affine(self):
+		'''Returns (a, b) such that the SI value is a*value+b'''
+		return self.__factor, self.__offset*self.__factor-self.__fix
+
 	def convert(self,value,to=None):
-		if value is None: return None
-		sivalue = (float(value)+self.__offset)*self.__factor-self.__fix
-		if to is None:
-			return sivalue
-		else:
-			return deconvert(to,sivalue)
+		return plan(self,to)(value)
 
 	def deconvert(self,value,orig=None):
-		if value is None: return None
-		if orig is not None:
-			value = convert(orig,value)
-		return (float(value)+self.__fix)/self.__factor-self.__offset
+		return plan(orig,self)(value)
 
 	def alpha(self,value,fmt=None):
 		if fmt is None:
@@ -99,6 +132,23 @@ class metric_unit:
 		val = self.deconvert(value)
 		return self.alpha(val,fmt)
 
+	def alpha_column(self,values,fmt=None,sep=None):
+		'''Formats a whole column of values with the unit symbol using a
+		single % operation; returns a list of strings, or one string
+		joined by sep if given'''
+		if fmt is None:
+			fmt = self.__fmt
+		fmt = fmt.replace('%s',self.__symbol.replace('%','%%'))
+		n = len(values)
+		if sep is None:
+			if not n: return []
+			return ((fmt+'\n')*n % tuple(values))[:-1].split('\n')
+		if not n: return ''
+		return ((fmt+sep)*n % tuple(values))[:-len(sep)]
+
+	def alpha_si_column(self,values,fmt=None,sep=None):
+		return self.alpha_column(self.deconvert(values),fmt,sep)
+
 si = metric_system('si')
 imp = metric_system('imp')
 cgs = metric_system('cgs')
@@ -112,15 +162,67 @@ def get_system(name):
 	assert name in aliases.keys(), 'Name "%s" not in aliases'%name
 	return aliases[name]
 
-def convert(unit,value,to=None):
+_numpy = []
+
+def _np():
+	'''NumPy, or None without it; imported on the first sequence so that
+	scalar-only callers never pay for loading it'''
+	if not _numpy:
+		try:
+			import numpy
+		except ImportError:
+			numpy = None
+		_numpy.append(numpy)
+	return _numpy[0]
+
+_scalars = (int,long,float,str,unicode)
+_sequences = (list,tuple)
+
+def _compile(a,b,float=float,isinstance=isinstance):
+	'''Returns the function value -> a*value+b, for scalars, NumPy arrays
+	or Python sequences (returned as arrays, or lists without NumPy);
+	a and b are kept as attributes of the function'''
+	def apply(value):
+		if value.__class__ is float: return value*a+b
+		if value is None: return None
+		if isinstance(value,_scalars): return float(value)*a+b
+		if isinstance(value,_sequences):
+			np = _np()
+			if np is None: return [float(v)*a+b for v in value]
+			value = np.asarray(value,dtype=float)
+		return value*a+b
+	apply.a = a
+	apply.b = b
+	return apply
+
+def _unit(unit):
 	if isinstance(unit,metric_unit):
-		return unit.convert(value,to)
-	return units[unit].convert(value,to)
+		return unit
+	return units[unit]
+
+def plan(orig,target=None):
+	'''Compiles the conversion from unit orig to unit target (units or
+	unit names; None stands for SI) into a cached multiply-add function'''
+	key = (orig,target)
+	if key not in plans:
+		a, b = 1.0, 0.0
+		if orig is not None:
+			a, b = _unit(orig).affine()
+		if target is not None:
+			c, d = _unit(target).affine()
+			a, b = a/c, (b-d)/c
+		plans[key] = _compile(a,b)
+	return plans[key]
+
+def convert(unit,value,to=None):
+	fn = plans.get((unit,to))
+	if fn is None: fn = plan(unit,to)
+	return fn(value)
 	
-def deconvert(name,value):
-	if isinstance(unit,metric_unit):
-		return unit.deconvert(value,to)
-	return units[unit].deconvert(value,to)
+def deconvert(unit,value,orig=None):
+	fn = plans.get((orig,unit))
+	if fn is None: fn = plan(orig,unit)
+	return fn(value)
 
 si.addunit('m','lenght')
 si.addunit('kg','mass')
@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Multiprocess and multithreaded bulk solve.
+
+ solve_table() has the same interface and results as
+ vpsicret.solve_table, but shards the rows across a process pool.  Input
+ and output columns live in shared memory (multiprocessing RawArray)
+ inherited by the workers, so no array is pickled; workers only receive
+ (start, stop) row ranges.  The pool and its buffers are kept between
+ calls and only rebuilt when a call needs more rows, other columns, a
+ different worker count or another pws, so a stream of chunks pays for
+ the process start-up once.  Every row goes through exactly the same
+ element-wise operations as in the serial path, so results are
+ bit-identical.
+
+ solve_table_threads() shards the rows the same way across a thread
+ pool kept between calls, writing straight into the output arrays.
+ The work of a shard is a few dozen NumPy ufunc calls on whole columns,
+ which release the GIL while they loop, so threads run on as many cores
+ as the pool has once shards are large enough (SHARD rows) for the
+ Python glue around those calls to be negligible.  It suits callers
+ that are threaded already and cannot pay for process start-up.
+ '''
+
+import atexit
+import threading
+import multiprocessing as mp
+from multiprocessing.pool import ThreadPool
+from multiprocessing.sharedctypes import RawArray
+import numpy as np
+import vpsicret
+from vpsicret import OUTPUTS
+
+_shared = None
+_procs = None
+_procs_lock = threading.Lock()
+_pools = {}
+_pools_lock = threading.Lock()
+# Smallest default shard [rows]
+SHARD = 4096
+
+def _init(inputs, outputs, pws):
+	global _shared
+	_shared = (
+		dict((name, np.frombuffer(buf)) for name, buf in inputs.items()),
+		dict((name, np.frombuffer(buf)) for name, buf in outputs.items()),
+		pws)
+
+def _work(task):
+	start, stop, names, scalars = task
+	inputs, outputs, pws = _shared
+	columns = dict(scalars)
+	for name in names:
+		columns[name] = inputs[name][start:stop]
+	solved = vpsicret.solve_table(columns,pws)
+	for name in OUTPUTS:
+		outputs[name][start:stop] = solved[name]
+	return stop-start
+
+def _shared_array(n, data=None):
+	buf = RawArray('d',n)
+	if data is not None:
+		np.frombuffer(buf)[:] = data
+	return buf
+
+def _split(columns):
+	arrays = {}
+	scalars = {}
+	for name, value in columns.items():
+		value = np.asarray(value,dtype=float)
+		if value.ndim: arrays[name] = value.ravel()
+		else: scalars[name] = float(value)
+	return arrays, scalars, max([a.size for a in arrays.values()] or [0])
+
+def solve_table(columns, processes=None, shard=None, pws=None):
+	"""
+	output: dict of arrays, as vpsicret.solve_table
+	input:
+		columns: mapping of column name to array or scalar, as
+			vpsicret.solve_table
+		processes: worker count (default: cpu count)
+		shard: rows per task (default: about four tasks per worker,
+			but no less than SHARD); tables of one shard or less are
+			solved serially
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	processes = processes or mp.cpu_count()
+	arrays, scalars, n = _split(columns)
+	shard = shard or max(SHARD,-(-n//(4*processes)))
+	if processes < 2 or n <= shard:
+		return vpsicret.solve_table(columns,pws)
+	with _procs_lock:
+		pool, inputs, outputs = _process_pool(processes,n,arrays.keys(),pws)
+		for name, a in arrays.items():
+			inputs[name][:n] = a
+		names = tuple(arrays)
+		pool.map(_work,[(i,min(i+shard,n),names,scalars) for i in range(0,n,shard)])
+		return dict((name, outputs[name][:n].copy()) for name in OUTPUTS)
+
+def _process_pool(processes, n, names, pws):
+	'''The kept pool, with input buffers for names and room for n rows,
+	rebuilt if it does not fit; returns (pool, inputs, outputs) with the
+	buffers as arrays'''
+	global _procs
+	if _procs is not None:
+		p, capacity, pool, inputs, outputs, backend = _procs
+		if p == processes and capacity >= n and backend == pws and set(names) <= set(inputs):
+			return pool, inputs, outputs
+		names = set(names) | set(inputs)
+		n = max(n,capacity)
+		close()
+	inputs = dict((name, _shared_array(n)) for name in names)
+	outputs = dict((name, _shared_array(n)) for name in OUTPUTS)
+	pool = mp.Pool(processes,_init,(inputs,outputs,pws))
+	_procs = (processes, n, pool,
+		dict((name, np.frombuffer(buf)) for name, buf in inputs.items()),
+		dict((name, np.frombuffer(buf)) for name, buf in outputs.items()),
+		pws)
+	return _procs[2:5]
+
+def close():
+	'''Stops the kept process pool, if any (called at exit)'''
+	global _procs
+	if _procs is not None:
+		pool = _procs[2]
+		_procs = None
+		pool.close()
+		pool.join()
+
+atexit.register(close)
+
+def _thread_pool(threads):
+	with _pools_lock:
+		if threads not in _pools:
+			_pools[threads] = ThreadPool(threads)
+		return _pools[threads]
+
+def solve_table_threads(columns, threads=None, shard=None, pws=None):
+	"""
+	output: dict of arrays, as vpsicret.solve_table
+	input:
+		columns: mapping of column name to array or scalar, as
+			vpsicret.solve_table
+		threads: worker count (default: cpu count)
+		shard: rows per task (default: about four tasks per worker,
+			but no less than SHARD)
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	threads = threads or mp.cpu_count()
+	arrays, scalars, n = _split(columns)
+	shard = shard or max(SHARD,-(-n//(4*threads)))
+	if threads < 2 or n <= shard:
+		return vpsicret.solve_table(columns,pws)
+	outputs = dict((name, np.empty(n)) for name in OUTPUTS)
+	def work(span):
+		start, stop = span
+		part = dict(scalars)
+		for name, column in arrays.items():
+			part[name] = column[start:stop]
+		solved = vpsicret.solve_table(part,pws)
+		for name in OUTPUTS:
+			outputs[name][start:stop] = solved[name]
+	_thread_pool(threads).map(work,[(i,min(i+shard,n)) for i in range(0,n,shard)])
+	return outputs
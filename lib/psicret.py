@@ -33,6 +33,7 @@
 
 
 import math
+import time
 import metricsys as msys
 # Adding pressure units
 msys.si.addunit('pascal','pressure',symbol='Pa')
@@ -45,6 +46,8 @@ msys.si.addunit('kJperkg','enthalpy',symbol='kJ/kg') # although the offical SI u
 msys.si.addunit('Jperkg','enthalpy',0.001,symbol='J/kg')
 msys.imp.addunit('btuperlb','enthalpy',1.055056/0.45359237,fix=17.88444444444,symbol='Btu/lb')
 msys.cgs.addunit('ergperg','enthalpy',10e-7,symbol='erg/g')
+# No more units: the registries are shared by every solving thread
+msys.freeze()
 
 
 def mean_pressure(elevation):
@@ -58,6 +61,195 @@ def mean_pressure(elevation):
 def altitude(pressure):
 	return ( 1-(pressure/101325)**(1/5.25588) ) / 2.25577E-5
 
+_pws = None
+
+def set_pws(backend=None):
+	'''Selects the saturation pressure function used by every psicret
+	computation that is not given its own, e.g. a pwstable.pws_table.
+	None goes back to the exact formula psicret.Pws.
+	'''
+	global _pws
+	_pws = backend
+
+_probe = None
+_plain = {}
+
+def set_probe(probe=None):
+	'''Installs an instrumentation probe (see instrument.collector): every
+	derivation step is timed and counted, and Pws evaluations are counted
+	through a wrapper that exists only while a probe is installed.  None
+	removes it.
+	'''
+	global _probe
+	if probe is not None and not _plain:
+		_plain['Pws'] = psicret.__dict__['Pws']
+		psicret.Pws = staticmethod(_counted('Pws',_plain['Pws'].__get__(None,psicret)))
+	elif probe is None and _plain:
+		for name, method in _plain.items():
+			setattr(psicret,name,method)
+		_plain.clear()
+	_probe = probe
+
+_dispatcher = None
+
+def set_dispatcher(dispatcher=None):
+	'''Routes psicret.solveall() through a dispatcher.dispatcher, which
+	batches the solves of concurrent callers; instances given their own
+	pws still solve on their own.  None goes back to solving in place.
+	'''
+	global _dispatcher
+	_dispatcher = dispatcher
+
+# Rounding allowance of the consistency checks on solved states
+_SLACK = 1e-9
+
+def _counted(name, fn):
+	def counted(*args, **kwargs):
+		_probe.count(name)
+		return fn(*args, **kwargs)
+	return counted
+
+def _Wdew(P,pws,dew):
+	Pds = pws(dew)
+	return 0.621945*Pds/(P - Pds)
+
+def _illinois(name, f, lo, hi, accuracy, maxiter, inputs):
+	'''Root of f bracketed in [lo,hi] by the Illinois variant of regula
+	falsi; NaN if f does not change sign over the bracket'''
+	flo, fhi = f(lo), f(hi)
+	if not flo*fhi <= 0:
+		return float('nan')
+	t, ft, side = lo, flo, 0
+	x = -1
+	for x in range(maxiter):
+		last = t
+		if fhi == flo: break
+		t = (lo*fhi - hi*flo)/(fhi - flo)
+		ft = f(t)
+		if ft == 0: break
+		if (ft > 0) == (fhi > 0):
+			hi, fhi = t, ft
+			if side < 0: flo*= 0.5
+			side = -1
+		else:
+			lo, flo = t, ft
+			if side > 0: fhi*= 0.5
+			side = 1
+		if abs(t-last) <= accuracy:
+			break
+	if _probe is not None:
+		_probe.iterations(name, x+1, ft, inputs)
+	return t
+
+# Dependency graph of the state properties: for each property, the ways
+# to derive it, in order of preference, as (inputs, function) where the
+# function takes (P, pws, *inputs).
+DEPENDS = {
+	'tdb': [
+		(('h','W'), lambda P,pws,h,W: psicret.T(h,W)),
+		(('twb','W'), lambda P,pws,twb,W: psicret.T2(twb,W,P,pws)),
+		(('rh','W'), lambda P,pws,rh,W: psicret.T5(rh,W,P,pws=pws)),
+		(('twb','h'), lambda P,pws,twb,h: psicret.T4(twb,h,P,pws)),
+		(('twb','rh'), lambda P,pws,twb,rh: psicret.T3(twb,rh,P,pws=pws)),
+		(('rh','h'), lambda P,pws,rh,h: psicret.T6(rh,h,P,pws=pws)),
+		],
+	'W': [
+		(('tdb','twb'), lambda P,pws,tdb,twb: psicret.W(tdb,twb,P,pws)),
+		(('dew',), _Wdew),
+		(('tdb','rh'), lambda P,pws,tdb,rh: psicret.W2(tdb,rh,P,pws)),
+		(('tdb','h'), lambda P,pws,tdb,h: psicret.W3(tdb,h)),
+		],
+	'h': [
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.h(tdb,W)),
+		],
+	'rh': [
+		(('tdb','twb'), lambda P,pws,tdb,twb: psicret.RH(tdb,twb,P,pws)),
+		(('tdb','dew'), lambda P,pws,tdb,dew: pws(dew)/pws(tdb)),
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.RH2(tdb,W,P,pws)),
+		],
+	'dew': [
+		(('W',), lambda P,pws,W: psicret.Dew(P,W)),
+		],
+	'twb': [
+		(('tdb','rh'), lambda P,pws,tdb,rh: psicret.Twb(tdb,rh,P,pws=pws)),
+		],
+	'pw': [
+		(('W',), lambda P,pws,W: psicret.Pw(P,W)),
+		],
+	'dsat': [
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.Dsat(tdb,W,P,pws)),
+		],
+	'sv': [
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.Sv(P,tdb,W)),
+		],
+	'mad': [
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.Mad(P,tdb,W)),
+		],
+	's': [
+		(('tdb','W'), lambda P,pws,tdb,W: psicret.S(tdb,W,P)),
+		],
+	}
+# Relative cost of deriving a property (default 1)
+COST = {'twb': 20}
+PROPERTIES = ('tdb','W','h','rh','dew','twb')
+# Solved on request only, not by solveall
+DERIVED = ('pw','dsat','sv','mad','s')
+UNSOLVABLE = {
+	'tdb': "Dry bulb temperature is unsolvable",
+	'W': "Humidity ratio is unsolvable",
+	'h': "Enthalpy is unsolvable",
+	'rh': "Relative humidity is unsolvable",
+	'dew': "Dew point is unsolvable",
+	'twb': "Wet bulb temperature is unsolvable",
+	'pw': "Vapor pressure is unsolvable",
+	'dsat': "Degree of saturation is unsolvable",
+	'sv': "Specific volume is unsolvable",
+	'mad': "Moist air density is unsolvable",
+	's': "Entropy is unsolvable",
+	}
+ALIASES = {'w': 'W', 'dp': 'dew', 'tdp': 'dew', 'wvp': 'pw'}
+
+_plans = {}
+
+def _cheapest(p, have, stack):
+	'''(cost, steps) of the cheapest derivation of p from the properties
+	in have, or None'''
+	if p in have: return 0, []
+	best = None
+	stack = stack+(p,)
+	for inputs, fn in DEPENDS.get(p,()):
+		if [i for i in inputs if i in stack]: continue
+		cost, steps = COST.get(p,1), []
+		for i in inputs:
+			sub = _cheapest(i,have,stack)
+			if sub is None: break
+			cost+= sub[0]
+			steps+= sub[1]
+		else:
+			if best is None or cost < best[0]:
+				best = cost, steps+[(p,inputs,fn)]
+	return best
+
+def _plan(known, targets):
+	'''Returns the derivation steps [(property, inputs, function)] that
+	produce targets from the known properties, or None if any target
+	cannot be solved.  Plans are cached per (known, targets).'''
+	key = (known,targets)
+	if key in _plans: return _plans[key]
+	steps = []
+	have = set(known)
+	for t in targets:
+		found = _cheapest(t,have,())
+		if found is None:
+			steps = None
+			break
+		for step in found[1]:
+			if step[0] not in have:
+				have.add(step[0])
+				steps.append(step)
+	_plans[key] = steps
+	return steps
+
 class psicret:
 	def __init__(self, system=msys.si, **kwargs):
 		if isinstance(system,msys.metric_system):
@@ -83,117 +275,88 @@ class psicret:
 		self.__rh = kwargs.pop('rh',None)
 		self.__W = kwargs.pop('ratio',kwargs.pop('W',None))
 		self.__h = sys.tosi('enthalpy',kwargs.pop('enthalpy',kwargs.pop('h',None)))
+		self.__pws = kwargs.pop('pws',None)
+		self.__pw = self.__dsat = self.__sv = self.__mad = self.__s = None
 		assert len(kwargs) == 0, "unrecognized params passed in: %s" % ",".join(kwargs.keys())
 
 	def system(self):
 		return self.__system
 		
-	def solvable(self):
+	@staticmethod
+	def sufficient(known, *targets):
+		'''Tells whether the properties named in known are enough to solve
+		targets (default: all of PROPERTIES)'''
+		return _plan(frozenset(known),targets or PROPERTIES) is not None
+
+	def solvable(self, *targets):
 		if self.__P is None: return False
-		if self.__tdb is None:
-			tdb = self.drybulb()
-			if tdb is None: return False
-		if self.__h is not None: return True
-		if self.__W is not None: return True
-		if self.__twb is not None: return True
-		if self.__dew is not None: return True
-		if self.__rh is not None: return True
-		return False
-	
-	def solveall(self):
-		if self.__tdb is None:
-			assert self.drybulb() is not None, "Dry bulb temperature is unsolvable"
-		if self.__W is None:
-			assert self.__solve_W() is not None, "Humidity ratio is unsolvable"
-			assert self.__W >= 0, "Humidity ratio is negative"
-		if self.__h is None:
-			assert self.__solve_h() is not None, "Enthalpy is unsolvable"
-		if self.__rh is None:
-			assert self.__solve_rh() is not None, "Relative humidity is unsolvable"
-		if self.__dew is None:
-			assert self.__solve_dew() is not None, "Dew point is unsolvable"
-		if self.__twb is None:
-			assert self.__solve_twb() is not None, "Wet bulb temperature is unsolvable"
-		return True
+		return _plan(self.__known(),targets or PROPERTIES) is not None
+
+	def __known(self):
+		return frozenset(p for p in PROPERTIES+DERIVED if getattr(self,'_psicret__'+p) is not None)
+
+	def __run(self, steps):
+		'''Runs the steps, publishing their results only once all are
+		computed: a thread reading an instance that another one is solving
+		sees each property either unknown or final.'''
+		P = self.__P
+		pws = self.__pws or _pws or psicret.Pws
+		got = {}
+		for p, inputs, fn in steps:
+			args = [got.get(i,getattr(self,'_psicret__'+i)) for i in inputs]
+			if _probe is None:
+				value = fn(P,pws,*args)
+			else:
+				start = time.time()
+				value = fn(P,pws,*args)
+				_probe.step('solve_'+p,time.time()-start)
+				_probe.count('solve_%s.%s' % (p,'+'.join(inputs)))
+			got[p] = value
+		for p, value in got.items():
+			setattr(self,'_psicret__'+p,value)
+
+	def solveall(self, record=False):
+		known = self.__known()
+		steps = _plan(known,PROPERTIES)
+		if steps is None:
+			for p in PROPERTIES:
+				assert _plan(known,(p,)) is not None, UNSOLVABLE[p]
+		if _dispatcher is not None and self.__pws is None and steps and len(known) == 2:
+			state = _dispatcher.submit_state(self.state()).result()
+			for name in solved_state.__slots__:
+				setattr(self,'_psicret__'+name,getattr(state,name))
+			return record and state or True
+		self.__run(steps)
+		assert self.__W >= 0, "Humidity ratio is negative"
+		return record and self.state() or True
+
+	def state(self):
+		'''Returns the solved state as a compact, immutable solved_state'''
+		return solved_state(self.__P, self.__tdb, self.__twb, self.__dew,
+			self.__rh, self.__W, self.__h)
+
+	@staticmethod
+	def fromstate(state, system=msys.si):
+		'''Rebuilds a displayable psicret instance from a solved_state'''
+		pp = psicret(msys.si, P=state.P, tdb=state.tdb, twb=state.twb,
+			dew=state.dew, rh=state.rh, W=state.W, h=state.h)
+		if not isinstance(system,msys.metric_system):
+			system = msys.get_system(system)
+		pp.__system = system
+		return pp
 
 	def solve(self,param):
+		'''Solves param and only what it depends on (see DEPENDS);
+		returns None if it cannot be solved from the known properties'''
 		p = param.lower()
-		if p == 'tdb':#dry bu
-			return self.drybulb()
-		if p == 'twb':
-			return self.__solve_twb()
-		if p in ['dp','dew','tdp']:
-			return self.__solve_dew()
-		if p == 'rh':
-			return self.__solve_rh()
-		if p == 'w':
-			return self.__solve_W()
-		if p == 'h':
-			return self.__solve_h()
-		if p in ['pw','wvp']:
-			return self.__solve_pw()
-		if p == 'dsat':
-			return self.__solve_dsat()
-		if p == 'sv':
-			return self.__solve_sv()
-		if p == 'mad':
-			return self.__solve_mad()
-		if p == 's':
-			return self.__solve_s()
+		p = ALIASES.get(p,p)
+		steps = _plan(self.__known(),(p,))
+		if steps is None: return None
+		self.__run(steps)
+		return getattr(self,'_psicret__'+p)
 
 	def drybulb(self):
-		if self.__tdb is not None: return self.__tdb
-		if self.__h is None: return None
-		if self.__W is None: return None
-		self.__tdb = (self.__h-(2501*self.__W))/(1.006+(1.86*self.__W))
-		return self.__tdb
-		
-	def __solve_W(self):
-		if self.__W is not None:
-			pass
-		elif self.__twb is not None:
-			self.__W = psicret.W(self.__tdb, self.__twb, self.__P)
-			print "S W>>> wet bulb",self.__twb,self.__W
-		elif self.__dew is not None:
-			Pds = psicret.Pws(self.__dew)
-			self.__W = 0.621945*Pds/(self.__P - Pds)
-			print "S W>>> dew point",self.__des,Pds,self.__W
-		elif self.__rh is not None:
-			self.__W = psicret.W2(self.__tdb, self.__rh, self.__P)
-			print "S W>>> rel.humid.",self.__rh,self.__W
-		elif self.__h is not None:
-			self.__W = (self.__h - 1.006*self.__tdb)/(2501 + 1.86*self.__tdb)
-			print "S W>>> enthalpy",self.__h,self.__W
-		return self.__W
-
-	def __solve_rh(self):
-		P = self.__P/1000
-		if self.__rh is not None:
-			pass
-		elif self.__twb is not None:
-			self.__rh = psicret.RH(self.__tdb, self.__twb, P)
-		elif self.__dew is not None:
-			self.__rh = psicret.Pws(self.__dew)/Sat_press(self.__tdb)
-		elif self.__W is not None:
-			self.__rh = psicret.Pw(P, self.__W) / Sat_press(self.__tdb)
-		elif self.__h is not None:
-			self.__rh = (self.__h - 1.006*self.__tdb)/(2501 + 1.86*self.__tdb)
-		return self.__rh
-
-	def __solve_h(self):
-		if self.__h is None:
-			self.__h = psicret.h(self.__tdb, self.__W)
-		return self.__h
-		
-	def __solve_dew(self):
-		if self.__dew is None:
-			self.__dew = psicret.Dew(self.__P, self.__W)
-		return self.__dew
-
-	def __solve_twb(self):
-		if self.__twb is None:
-			self.__twb = psicret.Twb(self.__tdb, self.__rh, self.__P)
-		return self.__twb
+		return self.solve('tdb')
 		
 	def alpha(self):
 		sys = self.__system
@@ -202,7 +365,7 @@ class psicret:
 		if sys==msys.imp:
 			elevation = sys.alpha_si('foot',self.__elevation,'%f %s o.s.l.')
 			ratio = 'lb(H₂O)/lb(dry air)'
-		elif sys==msys.gsi:
+		elif sys==msys.cgs:
 			elevation = '%f m o.s.l.'%self.__elevation
 			ratio = 'g(H₂O)/g(dry air)'
 		else:
@@ -221,6 +384,9 @@ class psicret:
 			alpha+= "Humidity Ratio: %f %s\n" % (self.__W, ratio)
 		if self.__h is not None:
 			alpha+= "Enthalpy:       %s\n" % sys.alpha_si('enthalpy',self.__h)
+		if self.__pw is not None:
+			alpha+= "Vapor Pressure: %s\n" % sys.alpha_si('pressure',self.__pw)
+		alpha+= self.__alpha_derived()
 
 		if self.__tdb is None:
 			alpha+= "Dry bulb Temp:  not calculated\n"
@@ -254,6 +420,9 @@ class psicret:
 			alpha+= "Humidity Ratio: %f kg(H₂O)/kg(air)\n" % self.__W
 		if self.__h is not None:
 			alpha+= "Enthalpy:       %f kJ/kg\n" % self.__h
+		if self.__pw is not None:
+			alpha+= "Vapor Pressure: %f Pa\n" % self.__pw
+		alpha+= self.__alpha_derived()
 
 		if self.__tdb is None:
 			alpha+= "Dry bulb Temp:  not calculated\n"
@@ -270,6 +439,28 @@ class psicret:
 
 		return alpha
 
+	def __alpha_derived(self):
+		# no units for these in metricsys yet, so always SI
+		alpha = ""
+		if self.__dsat is not None:
+			alpha+= "Deg. of Satur.: %f\n" % self.__dsat
+		if self.__sv is not None:
+			alpha+= "Spec. Volume:   %f m³/kg(dry air)\n" % self.__sv
+		if self.__mad is not None:
+			alpha+= "Density:        %f kg/m³\n" % self.__mad
+		if self.__s is not None:
+			alpha+= "Entropy:        %f kJ/kg·K\n" % self.__s
+		return alpha
+
+	@staticmethod
+	def solve_table(columns,pws=None):
+		"""
+		Bulk solve of a table of states given as a mapping of column name
+		to array; see vpsicret.solve_table (requires NumPy).
+		"""
+		import vpsicret
+		return vpsicret.solve_table(columns,pws)
+
 	@staticmethod
 	def Pw(P,W):
 		"""
@@ -281,15 +472,17 @@ class psicret:
 		return P*W/(0.62198+W)
 	
 	@staticmethod
-	def Pws(T,kelvin=False):
+	def Pws(T,kelvin=False,ice=None):
 		"""
 		output: saturation vapor pressure [Pa] for
 		input:
 			T: air temperature [°C or K] (dry bulb)
 			kelvin: True for Kelvin, False for Celsius
+			ice: force the ice (True) or water (False) branch
 		"""
 		if not kelvin: T += 273.15
-		if T>=273.15:
+		if ice is None: ice = T<273.15
+		if not ice:
 			lp = 1.3914993-5800.2206/T
 			lp-= 0.048640239*T
 			lp+= 0.000041764768*T**2
@@ -306,15 +499,44 @@ class psicret:
 			return math.exp(lp)
 			
 	@staticmethod
-	def W(T,Tw,P):
+	def dlnPws(T,kelvin=False,ice=None):
+		"""
+		output: derivative of ln(Pws) [1/K] for
+		input:
+			T: air temperature [°C or K] (dry bulb)
+			kelvin: True for Kelvin, False for Celsius
+			ice: force the ice (True) or water (False) branch
+		"""
+		if not kelvin: T += 273.15
+		if ice is None: ice = T<273.15
+		if not ice:
+			return (5800.2206/T**2 - 0.048640239 + 0.000083529536*T
+				- 0.000000043356279*T**2 + 6.5459673/T)
+		else:
+			return (5674.5359/T**2 - 0.009677843 + 0.00000124431402*T
+				+ 6.2243475E-09*T**2 - 3.7936096E-12*T**3 + 4.1635019/T)
+
+	@staticmethod
+	def dPws(T,kelvin=False):
+		"""
+		output: derivative of the saturation vapor pressure [Pa/K] for
+		input:
+			T: air temperature [°C or K] (dry bulb)
+			kelvin: True for Kelvin, False for Celsius
+		"""
+		return psicret.Pws(T,kelvin)*psicret.dlnPws(T,kelvin)
+
+	@staticmethod
+	def W(T,Tw,P,pws=None):
 		"""
 		output: humidity ratio [kg/kg] for
 		input:
 			T: air temperature [°C] (dry bulb)
 			Tw: wet bulb temperature [°C]
 			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
 		"""
-		Pws = psicret.Pws(Tw)
+		Pws = (pws or _pws or psicret.Pws)(Tw)
 		Ws = 0.62198*Pws / (P-Pws)
 		if T>=0:
 			return (((2501-2.326*Tw)*Ws - 1.006*(T-Tw)) /
@@ -324,63 +546,97 @@ class psicret:
 					 (2830+1.86*T-2.1*Tw))
 
 	@staticmethod
-	def W2(T,RH,P):
+	def W2(T,RH,P,pws=None):
 		"""
 		output: humidity ratio [kg/kg] for
 		input:
 			T: air temperature [°C] (dry bulb)
 			RH: relative humidity [--%]
 			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
 		"""
-		Pws = psicret.Pws(T)
+		Pws = (pws or _pws or psicret.Pws)(T)
 		return 0.62198*RH*Pws/(P-RH*Pws)
 
 	@staticmethod
-	def RH(T, Tw, P):
+	def RH(T, Tw, P, pws=None):
 		"""
 		output: relative humidity [--%] for
 		input:
 			T: air temperature [°C] (dry bulb)
 			Tw: wet bulb temperature [°C]
 			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
 		"""
-		W = psicret.W(T, Tw, P)
-		return psicret.Pw(P,W) / psicret.Pws(T)
+		W = psicret.W(T, Tw, P, pws)
+		return psicret.Pw(P,W) / (pws or _pws or psicret.Pws)(T)
 
 	@staticmethod
-	def RH2(T, W, P):
+	def RH2(T, W, P, pws=None):
 		"""
 		output: relative humidity [--%] for
 		input:
 			T: air temperature [°C] (dry bulb)
 			W: humidity ratio [kg/kg]
 			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
 		"""
 		Pw = psicret.Pw(P,W)
-		Pws = psicret.Pws(T)
+		Pws = (pws or _pws or psicret.Pws)(T)
 		return Pw / Pws
 
 	@staticmethod
-	def Twb(T,RH,P,accuracy=0.00001):
+	def Twb(T,RH,P,accuracy=0.00001,maxiter=100,pws=None):
 		"""
-		output: density of dry air [kg/m³] for
+		output: wet bulb temperature [°C] for
 		input:
 			T: air temperature [°C] (dry bulb)
 			RH: relative humidity [--%]
 			P: air pressure [Pa]
-			accuracy: Newton-Rhapson accuracy goal
+			accuracy: goal, relative on the humidity ratio or absolute
+				on the temperature step [K]
+			maxiter: iteration bound
+			pws: saturation pressure backend (see set_pws)
+		Safeguarded Newton-Rhapson: the root is kept bracketed between
+		-100°C and the dry bulb, and a bisection is taken whenever the
+		Newton step leaves the bracket or is not at least half the
+		previous step.  Steps shrink geometrically, so convergence takes
+		about log2((T+100)/accuracy) iterations; maxiter caps it.
 		"""
-		d=0.001
-		W0 = psicret.W2(T,RH,P)
+		pws = pws or _pws or psicret.Pws
+		W0 = psicret.W2(T,RH,P,pws)
+		if T>=0:
+			a,b,c,d = 2501.0,2.326,2501+1.86*T,4.186
+		else:
+			a,b,c,d = 2830.0,0.24,2830+1.86*T,2.1
+		lo,hi = min(-100.0,T),T
 		t = T
-		for x in range(1000):
-			W1 = psicret.W(T,t,P)
-			if abs((W1-W0)/W0) <= accuracy:
-				return t
-			W2 = psicret.W(T,t-d,P)
-			m = (W1-W2)/d
-			t-= (W1-W0)/m
-		return None
+		dx = hi-lo
+		x, f = -1, float('nan')
+		for x in range(maxiter):
+			Pws = pws(t)
+			Ws = 0.62198*Pws/(P-Pws)
+			n = (a-b*t)*Ws - 1.006*(T-t)
+			D = c-d*t
+			f = n/D - W0
+			if abs(f) <= accuracy*W0:
+				break
+			if f>0: hi = t
+			else: lo = t
+			dWs = 0.62198*P*Pws*psicret.dlnPws(t)/(P-Pws)**2
+			m = ((a-b*t)*dWs - b*Ws + 1.006)*D + d*n
+			s = m>0 and f*D*D/m or 0.0
+			if s and lo < t-s < hi and abs(2*s) <= abs(dx):
+				dx = s
+				t-= s
+			else:
+				dx = 0.5*(hi-lo)
+				t = lo+dx
+			if abs(dx) <= accuracy:
+				break
+		if _probe is not None:
+			_probe.iterations('Twb', x+1, f/(W0 or 1.0), (T,RH,P))
+		return t
 
 	@staticmethod
 	def h(T,W):
@@ -402,6 +658,130 @@ class psicret:
 		"""
 		return (h - 2501*W) / (1.006 + 1.86*W)
 
+	@staticmethod
+	def T2(Tw,W,P,pws=None):
+		"""
+		output: air temperature [°C] (dry bulb) for
+		input:
+			Tw: wet bulb temperature [°C]
+			W: humidity ratio [kg/kg]
+			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
+		The relation of W is linear in T; the ice coefficients are used
+		when the water ones give T<0.
+		"""
+		Pws = (pws or _pws or psicret.Pws)(Tw)
+		Ws = 0.62198*Pws / (P-Pws)
+		T = ((2501-2.326*Tw)*Ws + 1.006*Tw - W*(2501-4.186*Tw)) / (1.006+1.86*W)
+		if T<0:
+			T = ((2830-0.24*Tw)*Ws + 1.006*Tw - W*(2830-2.1*Tw)) / (1.006+1.86*W)
+		return T
+
+	@staticmethod
+	def T3(Tw,RH,P,accuracy=0.00001,maxiter=100,pws=None):
+		"""
+		output: air temperature [°C] (dry bulb) for
+		input:
+			Tw: wet bulb temperature [°C]
+			RH: relative humidity [--%]
+			P: air pressure [Pa]
+			accuracy: goal on the temperature step [K]
+			maxiter: iteration bound
+			pws: saturation pressure backend (see set_pws)
+		RH falls from 1 at T=Tw to 0 at the dry air temperature of the wet
+		bulb line, which bracket the root.  RH is taken as exactly 1 at
+		T=Tw, where rounding could otherwise lose saturated states.
+		"""
+		pws = pws or _pws or psicret.Pws
+		return _illinois('T3', lambda T: (T == Tw and 1.0 or psicret.RH(T,Tw,P,pws)) - RH,
+			Tw, psicret.T2(Tw,0.0,P,pws), accuracy, maxiter, (Tw,RH,P))
+
+	@staticmethod
+	def T4(Tw,h,P,pws=None):
+		"""
+		output: air temperature [°C] (dry bulb) for
+		input:
+			Tw: wet bulb temperature [°C]
+			h: enthalpy [kJ/kg]
+			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
+		Subtracting h from the relation of W leaves W alone.  Above 0°C
+		wet bulb lines and enthalpy lines nearly coincide, so this is
+		badly conditioned for Tw close to 0°C (singular at Tw=0).  As the
+		relation of W jumps at T=0, a few cold, nearly saturated states
+		share (Tw,h) with a warmer one; the warmer (water) solution is
+		returned whenever it gives T>=0 and 0<=RH<=1.  The ice solution
+		is NaN unless T>=Tw and 0<=RH<=1, as no state has that pair.
+		"""
+		pws = pws or _pws or psicret.Pws
+		Pws = pws(Tw)
+		Ws = 0.62198*Pws / (P-Pws)
+		if Tw:
+			W = ((2501-2.326*Tw)*Ws + 1.006*Tw - h) / (-4.186*Tw)
+			T = psicret.T(h,W)
+			if T>=0 and W >= -_SLACK and psicret.Pw(P,W) <= (1+_SLACK)*pws(T):
+				return T
+		W = ((2830-0.24*Tw)*Ws + 1.006*Tw - h) / (329-2.1*Tw)
+		T = psicret.T(h,W)
+		if not (T >= Tw-_SLACK and W >= -_SLACK and psicret.Pw(P,W) <= (1+_SLACK)*pws(T)):
+			return float('nan')
+		return T
+
+	@staticmethod
+	def T5(RH,W,P,accuracy=0.00001,maxiter=50,pws=None):
+		"""
+		output: air temperature [°C] (dry bulb) for
+		input:
+			RH: relative humidity [--%]
+			W: humidity ratio [kg/kg]
+			P: air pressure [Pa]
+			pws: saturation pressure backend (see set_pws)
+		"""
+		return psicret.Tsat(psicret.Pw(P,W)/RH,accuracy,maxiter,pws)
+
+	@staticmethod
+	def T6(RH,h,P,accuracy=0.00001,maxiter=100,pws=None):
+		"""
+		output: air temperature [°C] (dry bulb) for
+		input:
+			RH: relative humidity [--%]
+			h: enthalpy [kJ/kg]
+			P: air pressure [Pa]
+			accuracy: goal on the temperature step [K]
+			maxiter: iteration bound
+			pws: saturation pressure backend (see set_pws)
+		h grows with T along the RH line; dry air (h/1.006) bounds it
+		above, as does the temperature where W would be 60 kg/kg.
+		"""
+		pws = pws or _pws or psicret.Pws
+		hi = h/1.006
+		if RH*pws(hi) > 0.99*P:
+			hi = psicret.Tsat(0.99*P/RH,pws=pws)
+		return _illinois('T6', lambda T: psicret.h(T,psicret.W2(T,RH,P,pws)) - h,
+			min(-100.0,hi-1), hi, accuracy, maxiter, (RH,h,P))
+
+	@staticmethod
+	def Tsat(Pws,accuracy=0.00001,maxiter=50,pws=None):
+		"""
+		output: saturation temperature [°C] for
+		input:
+			Pws: saturation vapor pressure [Pa]
+			accuracy: goal on the temperature step [K]
+			maxiter: iteration bound
+			pws: saturation pressure backend (see set_pws)
+		Newton-Rhapson on ln(Pws), from the Magnus approximation.
+		"""
+		pws = pws or _pws or psicret.Pws
+		lp = math.log(Pws)
+		a = lp - math.log(611.2)
+		t = 243.12*a/(17.62-a)
+		for x in range(maxiter):
+			s = (math.log(pws(t)) - lp)/psicret.dlnPws(t)
+			t-= s
+			if abs(s) <= accuracy:
+				break
+		return t
+
 	@staticmethod
 	def W3(T,h):
 		"""
@@ -442,3 +822,79 @@ class psicret:
 		R = 287.055
 		return P/(R*T*(1+W/0.62198))
 
+	@staticmethod
+	def Sv(P,T,W,kelvin=False):
+		"""
+		output: specific volume [m³/kg dry air] for
+		input:
+			P: air pressure [Pa]
+			T: air temperature [°C] (dry bulb)
+			W: humidity ratio [kg/kg]
+		"""
+		return 1/psicret.Rda(P,T,W,kelvin)
+
+	@staticmethod
+	def Mad(P,T,W,kelvin=False):
+		"""
+		output: moist air density [kg/m³] for
+		input:
+			P: air pressure [Pa]
+			T: air temperature [°C] (dry bulb)
+			W: humidity ratio [kg/kg]
+		"""
+		return psicret.Rda(P,T,W,kelvin)*(1+W)
+
+	@staticmethod
+	def Dsat(T,W,P,pws=None):
+		"""
+		output: degree of saturation [--%] for
+		input:
+			T: air temperature [°C] (dry bulb)
+			W: humidity ratio [kg/kg]
+			P: air pressure [Pa]
+		"""
+		Pws = (pws or _pws or psicret.Pws)(T)
+		return W*(P-Pws)/(0.62198*Pws)
+
+	@staticmethod
+	def S(T,W,P):
+		"""
+		output: entropy [kJ/(kg·K), per kg of dry air] for
+		input:
+			T: air temperature [°C] (dry bulb)
+			W: humidity ratio [kg/kg]
+			P: air pressure [Pa]
+		Ideal gas mixture, with the same heat capacities as h; zero for
+		dry air at 0°C and 101325 Pa and for liquid water at 0°C.
+		"""
+		lnT = math.log(T/273.15+1)
+		Pw = psicret.Pw(P,W)
+		s = 1.006*lnT - 0.287055*math.log((P-Pw)/101325)
+		if W > 0:
+			s+= W*(2501/273.15 + 1.86*lnT - 0.46152*math.log(Pw/611.2))
+		return s
+
+
+class solved_state(object):
+	'''Immutable record of a solved state, in SI units.  It holds only the
+	seven floats in __slots__, a fraction of the memory of a psicret
+	instance; psicret.fromstate() or alpha() give the displayable form.
+	'''
+	__slots__ = ('P','tdb','twb','dew','rh','W','h')
+
+	def __init__(self, P, tdb, twb, dew, rh, W, h):
+		for name, value in zip(solved_state.__slots__,(P,tdb,twb,dew,rh,W,h)):
+			object.__setattr__(self,name,value)
+
+	def __setattr__(self, name, value):
+		raise AttributeError('solved_state is immutable')
+
+	def __reduce__(self):
+		return (solved_state, tuple(getattr(self,name) for name in solved_state.__slots__))
+
+	def __repr__(self):
+		return 'solved_state(%s)' % ', '.join('%s=%r' % (name,getattr(self,name))
+			for name in solved_state.__slots__)
+
+	def alpha(self, system=msys.si):
+		return psicret.fromstate(self,system).alpha()
@@ -0,0 +1,407 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ HTTP/JSON front end of the solver.
+
+ A single asyncore loop accepts the connections and parses the requests.
+ Single-state solves arriving within `window` seconds of each other are
+ coalesced and solved as one vpsicret.solve_table call.  Batches of
+ `heavy` rows or more, and every table, are solved on a thread pool
+ while the loop keeps serving; table results are streamed back `chunk`
+ rows at a time with chunked transfer encoding, formatted only as the
+ socket drains.
+
+	GET  /solve?tdb=25&rh=0.5&P=90000
+	POST /solve    {"tdb": 25, "rh": 0.5, "elevation": 1500}
+	POST /table    {"tdb": [20, 25, 30], "rh": [0.5, 0.5, 0.5], "P": 101325}
+
+ Inputs are SI, as in vpsicret.solve_table (rh as a fraction, P in Pa);
+ without P or elevation the pressure is that of sea level.  /solve
+ answers an object with every name of vpsicret.OUTPUTS, null where the
+ state cannot be solved; /table answers {"columns": [...], "rows":
+ [[...], ...]}.  Connections are kept alive (HTTP/1.1) and pipelined
+ requests are answered in order.
+ '''
+
+import os
+import re
+import sys
+import json
+import time
+import signal
+import socket
+import asyncore
+import asynchat
+import urlparse
+import collections
+import multiprocessing
+from multiprocessing.pool import ThreadPool
+import numpy as np
+import vpsicret
+from vpsicret import OUTPUTS
+from psicret import mean_pressure
+
+PORT = 8080
+WINDOW = 0.002		# [s] coalescing window of /solve
+BATCH = 1024		# most states per coalesced solve
+HEAVY = 256			# coalesced solves of this size go to the pool
+CHUNK = 1000		# table rows per streamed chunk
+MAXHEAD = 65536
+MAXBODY = 16<<20
+
+_NAMES = {'ratio':'W', 'enthalpy':'h', 'pressure':'P'}
+_INPUTS = vpsicret.INPUTS+('P','elevation')
+_REASONS = {100:'Continue', 200:'OK', 400:'Bad Request', 404:'Not Found',
+	405:'Method Not Allowed', 413:'Request Entity Too Large',
+	500:'Internal Server Error'}
+_OBJECT = '{%s}' % ','.join('"%s":%%.12g' % name for name in OUTPUTS)
+_ROW = '[%s]' % ','.join(['%.12g']*len(OUTPUTS))
+_nonfinite = re.compile(r'-?(?:nan|inf)')
+
+class http_error(Exception):
+	def __init__(self, status, message=None):
+		Exception.__init__(self, message or _REASONS[status])
+		self.status = status
+
+def _inputs(fields):
+	if not isinstance(fields, dict):
+		raise http_error(400,'Expected a JSON object')
+	got = {}
+	for name, value in fields.items():
+		name = _NAMES.get(name,name)
+		if name not in _INPUTS:
+			raise http_error(400,'Unknown input: %s' % name)
+		got[name] = value
+	return got
+
+def state(fields):
+	'''Inputs {name: value} of a /solve request, with P'''
+	row = {}
+	try:
+		for name, value in _inputs(fields).items():
+			row[name] = float(value)
+	except (TypeError, ValueError):
+		raise http_error(400,'Inputs must be numbers')
+	if len([name for name in row if name in vpsicret.INPUTS]) != 2:
+		raise http_error(400,'Exactly two independent inputs are needed')
+	elevation = row.pop('elevation',None)
+	if 'P' not in row:
+		row['P'] = mean_pressure(elevation)
+	return row
+
+def columns(fields):
+	'''Columns {name: array or scalar} of a /table request'''
+	cols = {}
+	try:
+		for name, value in _inputs(fields).items():
+			cols[name] = np.asarray(value,dtype=float)
+	except (TypeError, ValueError):
+		raise http_error(400,'Columns must be numbers or arrays of numbers')
+	sizes = set(c.size for c in cols.values() if c.ndim)
+	if len(sizes) > 1 or any(c.ndim > 1 for c in cols.values()):
+		raise http_error(400,'Columns must have the same length')
+	if 'P' in cols:
+		cols.pop('elevation',None)
+	return cols
+
+def solve_rows(rows):
+	'''Solves a list of states() as one table; returns an array with a
+	row per state and a column per name of OUTPUTS'''
+	cols = {'P': np.array([row['P'] for row in rows])}
+	for name in vpsicret.INPUTS:
+		if any(name in row for row in rows):
+			cols[name] = np.array([row.get(name,np.nan) for row in rows])
+	solved = vpsicret.solve_table(cols)
+	return np.column_stack([solved[name] for name in OUTPUTS])
+
+def _json(fmt, values):
+	'''fmt % values, with null for NaN and infinities'''
+	text = fmt % tuple(values.tolist())
+	if np.isfinite(values).all(): return text
+	return _nonfinite.sub('null',text)
+
+def _table(solved, chunk):
+	'''The JSON text of a solved table, chunk rows at a time'''
+	table = np.column_stack([solved[name] for name in OUTPUTS])
+	yield '{"columns":%s,"rows":[' % json.dumps(OUTPUTS)
+	for i in range(0,len(table),chunk):
+		block = table[i:i+chunk]
+		text = _json(','.join([_ROW]*len(block)),block.ravel())
+		yield i and ','+text or text
+	yield ']}'
+
+class _chunked:
+	'''asynchat producer of the chunked transfer encoding of the strings
+	of an iterable, pulled one at a time as the socket drains'''
+	def __init__(self, parts, encode=True):
+		self.__parts = iter(parts)
+		self.__encode = encode
+		self.__done = False
+
+	def more(self):
+		if self.__done: return ''
+		for part in self.__parts:
+			if not part: continue
+			if not self.__encode: return part
+			return '%x\r\n%s\r\n' % (len(part),part)
+		self.__done = True
+		return self.__encode and '0\r\n\r\n' or ''
+
+class _wakeup(asyncore.file_dispatcher):
+	'''Runs in the loop the calls posted by other threads'''
+	def __init__(self, map):
+		r, self.__w = os.pipe()
+		asyncore.file_dispatcher.__init__(self,r,map)
+		os.close(r)
+		self.__calls = collections.deque()
+
+	def post(self, call, *args):
+		self.__calls.append((call,args))
+		os.write(self.__w,'.')
+
+	def writable(self):
+		return False
+
+	def handle_read(self):
+		self.recv(4096)
+		while self.__calls:
+			call, args = self.__calls.popleft()
+			call(*args)
+
+	def handle_close(self):
+		self.close()
+
+	def close(self):
+		asyncore.file_dispatcher.close(self)
+		if self.__w is not None:
+			os.close(self.__w)
+			self.__w = None
+
+class _channel(asynchat.async_chat):
+	def __init__(self, server, sock):
+		asynchat.async_chat.__init__(self,sock,server.map)
+		self.server = server
+		self.set_terminator('\r\n\r\n')
+		self.__data = []
+		self.__size = 0
+		self.__head = None
+		self.__slots = collections.deque()
+		self.__closed = False
+
+	def collect_incoming_data(self, data):
+		if self.__closed: return
+		self.__size+= len(data)
+		if self.__head is None and self.__size > MAXHEAD:
+			self.__fail(413)
+		else:
+			self.__data.append(data)
+
+	def found_terminator(self):
+		if self.__closed: return
+		data = ''.join(self.__data)
+		self.__data = []
+		self.__size = 0
+		if self.__head is None:
+			try:
+				lines = data.lstrip('\r\n').split('\r\n')
+				method, target, version = lines[0].split()
+				headers = dict((name.strip().lower(), value.strip())
+					for name, value in (line.split(':',1) for line in lines[1:]))
+				length = int(headers.get('content-length',0))
+			except ValueError:
+				return self.__fail(400)
+			if length > MAXBODY:
+				return self.__fail(413)
+			if length > 0:
+				self.__head = method, target, version, headers
+				if headers.get('expect','').lower() == '100-continue':
+					self.push('%s 100 Continue\r\n\r\n' % version)
+				self.set_terminator(length)
+				return
+			body = ''
+		else:
+			(method, target, version, headers), self.__head = self.__head, None
+			body = data
+			self.set_terminator('\r\n\r\n')
+		self.request(method,target,version,headers,body)
+
+	def request(self, method, target, version, headers, body):
+		connection = headers.get('connection','').lower()
+		if version == 'HTTP/1.0':
+			keep = connection == 'keep-alive'
+		else:
+			keep = connection != 'close'
+		slot = [None, version, keep]
+		self.__slots.append(slot)
+		url = urlparse.urlsplit(target)
+		try:
+			if url.path == '/solve':
+				if method == 'GET':
+					fields = dict(urlparse.parse_qsl(url.query))
+				elif method == 'POST':
+					fields = json.loads(body)
+				else:
+					raise http_error(405)
+				self.server.submit(self,slot,state(fields))
+			elif url.path == '/table':
+				if method != 'POST':
+					raise http_error(405)
+				self.server.table(self,slot,columns(json.loads(body)))
+			else:
+				raise http_error(404)
+		except http_error, e:
+			self.reply(slot,e.status,json.dumps({'error': str(e)}))
+		except ValueError, e:
+			self.reply(slot,400,json.dumps({'error': str(e)}))
+
+	def reply(self, slot, status, body=None, parts=None):
+		'''Answers the request of slot with the text body, or with the
+		strings of the iterable parts; answers go out in request order'''
+		if self.__closed: return
+		slot[0] = status, body, parts
+		while self.__slots and self.__slots[0][0] is not None:
+			(status, body, parts), version, keep = self.__slots.popleft()
+			head = ['%s %d %s' % (version,status,_REASONS[status]),
+				'Content-Type: application/json']
+			chunked = parts is not None and version != 'HTTP/1.0'
+			if parts is None:
+				head.append('Content-Length: %d' % len(body))
+			elif chunked:
+				head.append('Transfer-Encoding: chunked')
+			else:
+				keep = False
+			if not keep:
+				head.append('Connection: close')
+			elif version == 'HTTP/1.0':
+				head.append('Connection: keep-alive')
+			head = '\r\n'.join(head)+'\r\n\r\n'
+			if parts is None:
+				self.push(head+body)
+			else:
+				self.push(head)
+				self.push_with_producer(_chunked(parts,chunked))
+			if not keep:
+				self.__slots.clear()
+				self.__closed = True
+				self.close_when_done()
+
+	def readable(self):
+		return not self.__closed and asynchat.async_chat.readable(self)
+
+	def __fail(self, status):
+		'''Answers status to the request being read and closes'''
+		self.__data = []
+		self.__head = None
+		slot = [None, 'HTTP/1.1', False]
+		self.__slots.append(slot)
+		self.reply(slot,status,json.dumps({'error': _REASONS[status]}))
+
+	def handle_close(self):
+		self.__closed = True
+		self.close()
+
+class server(asyncore.dispatcher):
+	def __init__(self, address=('',PORT), window=WINDOW, batch=BATCH,
+			heavy=HEAVY, chunk=CHUNK, threads=None):
+		'''address: (host, port) to listen on
+		window: [s] longest wait of a /solve for others to batch with
+		batch: most states per coalesced solve
+		heavy: coalesced solves of this size or more run on the pool
+		chunk: table rows per streamed chunk
+		threads: size of the pool (default: cpu count)'''
+		self.map = {}
+		asyncore.dispatcher.__init__(self,map=self.map)
+		self.create_socket(socket.AF_INET,socket.SOCK_STREAM)
+		self.set_reuse_addr()
+		self.bind(address)
+		self.listen(1024)
+		self.window = window
+		self.batch = batch
+		self.heavy = heavy
+		self.chunk = chunk
+		self.pool = ThreadPool(threads or multiprocessing.cpu_count())
+		self.wakeup = _wakeup(self.map)
+		self.__pending = []
+		self.__due = None
+
+	def handle_accept(self):
+		pair = self.accept()
+		if pair is not None:
+			pair[0].setsockopt(socket.IPPROTO_TCP,socket.TCP_NODELAY,1)
+			_channel(self,pair[0])
+
+	def submit(self, channel, slot, row):
+		'''Queues a single state for the next coalesced solve'''
+		if not self.__pending:
+			self.__due = time.time()+self.window
+		self.__pending.append((channel,slot,row))
+		if len(self.__pending) >= self.batch:
+			self.flush()
+
+	def flush(self):
+		'''Solves the queued states'''
+		pending, self.__pending, self.__due = self.__pending, [], None
+		if not pending: return
+		rows = [row for channel, slot, row in pending]
+		done = lambda table, error: self.__answer(pending,table,error)
+		if len(rows) >= self.heavy:
+			self.offload(done,solve_rows,rows)
+		else:
+			try: done(solve_rows(rows),None)
+			except Exception, e: done(None,e)
+
+	def table(self, channel, slot, cols):
+		'''Solves a table on the pool and streams it back'''
+		def done(solved, error):
+			if error is not None:
+				channel.reply(slot,*self.__error(error))
+			else:
+				channel.reply(slot,200,parts=_table(solved,self.chunk))
+		self.offload(done,vpsicret.solve_table,cols)
+
+	def offload(self, done, call, *args):
+		'''Runs call(*args) on the pool, then done(result, error) in the loop'''
+		def run():
+			try: result, error = call(*args), None
+			except Exception, e: result, error = None, e
+			self.wakeup.post(done,result,error)
+		self.pool.apply_async(run)
+
+	def __answer(self, pending, table, error):
+		if error is not None:
+			status, body = self.__error(error)
+			for channel, slot, row in pending:
+				channel.reply(slot,status,body)
+			return
+		for (channel, slot, row), values in zip(pending,table):
+			channel.reply(slot,200,_json(_OBJECT,values))
+
+	def __error(self, error):
+		status = isinstance(error,ValueError) and 400 or 500
+		return status, json.dumps({'error': str(error)})
+
+	def serve_forever(self):
+		try:
+			while self.map:
+				timeout = 30.0
+				if self.__due is not None:
+					timeout = max(0.0,self.__due-time.time())
+				asyncore.loop(timeout,True,self.map,1)
+				if self.__due is not None and time.time() >= self.__due:
+					self.flush()
+		finally:
+			self.shutdown()
+
+	def shutdown(self):
+		asyncore.close_all(self.map)
+		self.pool.terminate()
+
+def run(address=('',PORT), **options):
+	'''Serves on address until SIGTERM or SIGINT; options as for server'''
+	httpd = server(address,**options)
+	signal.signal(signal.SIGTERM,lambda signum, frame: sys.exit(0))
+	try:
+		httpd.serve_forever()
+	except KeyboardInterrupt:
+		pass
@@ -0,0 +1,124 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Persistent solver service for the command line interface.
+
+ The service keeps the library loaded and answers one request per line,
+ either on stdin/stdout (serve) or on a Unix domain socket (listen), so
+ a caller pays neither the interpreter start nor the imports per solve.
+
+ A request is the list of command line arguments, without the program
+ name, as a JSON array or as a shell-quoted line:
+
+	["-P", "101.325", "-t", "25", "-p", "50"]
+	-P 101.325 -t 25 -p 50
+	-i -P 14.7 -t 77 -p 50
+
+ Units are those of the command line: -P is in kPa, or in psi with -i.
+
+ The answer is the text the command line would print for those
+ arguments (see answer()), followed by an empty line.  cli/psiclient.py
+ is the matching thin client.
+ '''
+
+import os
+import sys
+import json
+import shlex
+import signal
+import SocketServer
+from arguments import args, HELP
+from psicret import psicret
+
+SOCKET = os.environ.get('PSICRET_SOCKET') or '/tmp/psicret-%d.sock' % os.getuid()
+
+# Point options: (option, psicret parameter, scale or (SI scale, imperial scale))
+POINT = (
+	('dbt','tdb',1),
+	('wbt','twb',1),
+	('dpt','dew',1),
+	('relative','rh',0.01),
+	('ratio','W',1),
+	('entalpy','h',1),
+	('pressure','pressure',(1000.0,1)),
+	('elevation','elevation',1),
+	)
+
+def parser():
+	'''A fresh args instance with the options of the manual'''
+	cli = args(HELP, compiled=True)
+	cli.rflags('si','english')
+	cli.rkeys(**dict((option, None) for option, name, scale in POINT))
+	cli.ralias(m='si', i='english', P='pressure', E='elevation', t='dbt',
+		w='wbt', d='dpt', p='relative', r='ratio', e='entalpy')
+	return cli
+
+def point(cli):
+	'''psicret parameters of the parsed options; the first two numeric
+	free arguments are the dry bulb and the relative humidity [%]'''
+	kwargs = {}
+	english = cli.isset('english')
+	for option, name, scale in POINT:
+		value = cli.value(option)
+		if value is True:
+			raise ValueError('Missing value for --%s' % option)
+		if isinstance(scale,tuple):
+			scale = scale[english and 1 or 0]
+		if value is not None:
+			kwargs[name] = float(value)*scale
+	free = []
+	for value in cli.free():
+		try: free.append(float(value))
+		except ValueError: pass
+	for (name, scale), value in zip((('tdb',1),('rh',0.01)),free):
+		kwargs.setdefault(name,value*scale)
+	return kwargs
+
+def answer(argv):
+	'''Output text for the command line arguments argv'''
+	cli = parser()
+	cli.parse(argv)
+	try:
+		pp = psicret(cli.isset('english') and 'imp' or 'si', **point(cli))
+		pp.solveall()
+		return pp.alpha()
+	except Exception, e:
+		return 'error: %s\n' % e
+
+def tokens(line):
+	line = line.strip()
+	if line.startswith('['):
+		return [str(token) for token in json.loads(line)]
+	return shlex.split(line)
+
+def serve(fin=sys.stdin, fout=sys.stdout):
+	'''Answers the requests read from fin until end of file; a request
+	that fails is answered with its error and never stops the server'''
+	for line in iter(fin.readline,''):
+		try:
+			text = answer(tokens(line))
+		except Exception, e:
+			text = 'error: %s\n' % e
+		fout.write(text+'\n')
+		fout.flush()
+
+class _handler(SocketServer.StreamRequestHandler):
+	def handle(self):
+		serve(self.rfile,self.wfile)
+
+class _server(SocketServer.ThreadingMixIn, SocketServer.UnixStreamServer):
+	daemon_threads = True
+
+def listen(path=SOCKET):
+	'''Serves every connection to the Unix domain socket at path, each
+	one for as many requests as the client sends'''
+	if os.path.exists(path):
+		os.unlink(path)
+	server = _server(path,_handler)
+	signal.signal(signal.SIGTERM,lambda signum, frame: sys.exit(0))
+	try:
+		server.serve_forever()
+	finally:
+		server.server_close()
+		os.unlink(path)
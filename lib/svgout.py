@@ -0,0 +1,140 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Page formats and streaming SVG output.
+
+ page_format() reads conf/fmt-*.par, converting every length to pixels
+ at the resolution of the format; results are cached and only re-read
+ when the file changes.
+
+ svg_writer writes an SVG document piece by piece to a file handle.
+ Marker and polyline coordinates are formatted and written chunk rows
+ at a time, so a plot of any number of points needs no more memory than
+ one chunk of text.
+
+	page = page_format('a4')
+	svg = svg_writer(out)
+	svg.begin(page['width'], page['height'])
+	svg.group(class_='states', fill='#c00')
+	svg.circles(x, y, r=2)
+	svg.end()
+ '''
+
+import os
+import re
+import ConfigParser
+import numpy as np
+
+CONF = os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','conf')
+_INCH = {'in': 1.0, 'mm': 1/25.4, 'cm': 1/2.54, 'm': 1/0.0254}
+_formats = {}
+
+def _length(text, dpi):
+	'''Length [px] of a parameter such as 297mm, 11in or 800'''
+	m = re.match(r'\s*([-+.\d]+)\s*([a-z]*)\s*$',text)
+	value, unit = float(m.group(1)), m.group(2)
+	if unit in ('','px'): return value
+	return value*_INCH[unit]*dpi
+
+def page_format(name='default', kind='vector'):
+	'''Page {width, height, margins, dpi} [px] of conf/fmt-name.par, from
+	its [kind] section (or the other one if it has no such section) and
+	[common].  Returns a new dict on every call.'''
+	path = os.path.join(CONF,'fmt-%s.par' % name)
+	mtime = os.path.getmtime(path)
+	key = (name,kind)
+	if key not in _formats or _formats[key][0] != mtime:
+		cp = ConfigParser.RawConfigParser()
+		cp.read(path)
+		section = cp.has_section(kind) and kind or [s for s in ('vector','raster') if cp.has_section(s)][0]
+		params = dict(cp.items('common')) if cp.has_section('common') else {}
+		params.update(cp.items(section))
+		if 'dpi' in params: dpi = float(params['dpi'])
+		elif 'dpm' in params: dpi = float(params['dpm'])*0.0254
+		else: dpi = 90.0
+		_formats[key] = mtime, {'width': _length(params['width'],dpi),
+			'height': _length(params['height'],dpi),
+			'margins': _length(params.get('margins','0'),dpi), 'dpi': dpi}
+	return dict(_formats[key][1])
+
+def _escape(text):
+	return str(text).replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
+
+def _attrs(attrs):
+	return ''.join(' %s="%s"' % (name.replace('_','-'), _escape(value))
+		for name, value in sorted(attrs.items()) if value is not None)
+
+class svg_writer:
+	def __init__(self, out, chunk=4096):
+		'''out: file handle
+		chunk: rows formatted per write'''
+		self.out = out
+		self.chunk = chunk
+		self.__open = []
+
+	def begin(self, width, height):
+		self.out.write('<?xml version="1.0" encoding="utf-8"?>\n'
+			'<svg xmlns="http://www.w3.org/2000/svg" width="%.0f" height="%.0f"'
+			' viewBox="0 0 %.0f %.0f">\n' % (width,height,width,height))
+		self.__open.append('svg')
+
+	def end(self):
+		'''Closes every open group and the document'''
+		while self.__open:
+			self.out.write('</%s>\n' % self.__open.pop())
+
+	def raw(self, text):
+		self.out.write(text)
+
+	def copy(self, fp, size=65536):
+		'''Copies the SVG elements read from fp'''
+		while True:
+			block = fp.read(size)
+			if not block: break
+			self.out.write(block)
+
+	def style(self, css):
+		self.out.write('<style>%s</style>\n' % css)
+
+	def group(self, **attrs):
+		'''Opens a group (class_ gives the class attribute)'''
+		attrs = dict((name.rstrip('_'), value) for name, value in attrs.items())
+		self.out.write('<g%s>\n' % _attrs(attrs))
+		self.__open.append('g')
+
+	def endgroup(self):
+		self.out.write('</%s>\n' % self.__open.pop())
+
+	def rect(self, x, y, width, height, **attrs):
+		self.out.write('<rect x="%.1f" y="%.1f" width="%.1f" height="%.1f"%s/>\n' % (
+			x,y,width,height,_attrs(attrs)))
+
+	def text(self, x, y, text, anchor='middle', **attrs):
+		self.out.write('<text x="%.1f" y="%.1f" text-anchor="%s"%s>%s</text>\n' % (
+			x,y,anchor,_attrs(attrs),_escape(text)))
+
+	def polyline(self, x, y, **attrs):
+		'''A polyline through the points of the arrays x, y'''
+		self.out.write('<polyline%s points="' % _attrs(attrs))
+		self.__rows('%.1f,%.1f ',x,y)
+		self.out.write('"/>\n')
+
+	def circles(self, x, y, r=2):
+		'''One circle of radius r per point of the arrays x, y'''
+		self.__rows('<circle cx="%%.1f" cy="%%.1f" r="%g"/>\n' % r,x,y)
+
+	def rects(self, x, y, width, height, fill):
+		'''One width x height rectangle per point of the arrays x, y (top
+		left corners), filled with the colors of the sequence fill'''
+		fmt = '<rect x="%%.1f" y="%%.1f" width="%.2f" height="%.2f" fill="%%s"/>\n' % (width,height)
+		n = len(x)
+		for i in range(0,n,self.chunk):
+			j = min(i+self.chunk,n)
+			self.out.write(''.join([fmt % row for row in zip(x[i:j],y[i:j],fill[i:j])]))
+
+	def __rows(self, fmt, x, y):
+		n = len(x)
+		for i in range(0,n,self.chunk):
+			j = min(i+self.chunk,n)
+			self.out.write(fmt*(j-i) % tuple(np.column_stack((x[i:j],y[i:j])).ravel()))
@@ -0,0 +1,601 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Array-aware companion to the psicret static property functions.
+
+ Every function here takes NumPy arrays (or scalars, which broadcast
+ against arrays) and follows the same equations, units and argument
+ order as the homonymous static method of psicret.  Branches of the
+ scalar code (ice/water in Pws, T>=0 in W, d>0 in Dew) are handled with
+ masks, so a whole column is evaluated with a handful of ufunc calls.
+
+ On 100k-element columns (bench/benchmark.py) this is about 20-30 times
+ the throughput of looping over the scalar functions: Pws 1.40 -> 0.053,
+ W2 1.88 -> 0.068 and Dew 1.31 -> 0.073 us per element.  One log and one
+ exp per element, at about 9 ns each, set the floor.
+ '''
+
+import numpy as np
+from psicret import mean_pressure, solved_state, _SLACK
+
+def _array(x):
+	return np.asarray(x, dtype=float)
+
+def _lnpws_water(T):
+	lp = T*(0.000041764768 - 0.000000014452093*T)
+	lp-= 0.048640239
+	lp*= T
+	lp+= 1.3914993
+	lp-= 5800.2206/T
+	lp+= 6.5459673*np.log(T)
+	return lp
+
+def _lnpws_ice(T):
+	lp = T*(2.0747825E-09 - 9.484024E-13*T)
+	lp+= 0.00000062215701
+	lp*= T
+	lp-= 0.009677843
+	lp*= T
+	lp+= 6.3925247
+	lp-= 5674.5359/T
+	lp+= 4.1635019*np.log(T)
+	return lp
+
+def Pw(P,W):
+	"""
+	output: partial vapor pressure [Pa] for
+	input:
+		P: air pressure [Pa]
+		W: humidity ratio [kg/kg]
+	"""
+	W = _array(W)
+	return P*W/(0.62198+W)
+
+def Pws(T,kelvin=False):
+	"""
+	output: saturation vapor pressure [Pa] for
+	input:
+		T: air temperature [°C or K] (dry bulb)
+		kelvin: True for Kelvin, False for Celsius
+	"""
+	T = _array(T)
+	if not kelvin: T = T + 273.15
+	lp = _lnpws_water(T)
+	ice = T<273.15
+	if ice.any():
+		if lp.ndim:
+			lp[ice] = _lnpws_ice(T[ice])
+		else:
+			lp = _lnpws_ice(T)
+	return np.exp(lp)
+
+def dlnPws(T,kelvin=False):
+	"""
+	output: derivative of ln(Pws) [1/K] for
+	input:
+		T: air temperature [°C or K] (dry bulb)
+		kelvin: True for Kelvin, False for Celsius
+	"""
+	T = _array(T)
+	if not kelvin: T = T + 273.15
+	T2 = T*T
+	water = (5800.2206/T2 - 0.048640239 + 0.000083529536*T
+		- 0.000000043356279*T2 + 6.5459673/T)
+	ice = (5674.5359/T2 - 0.009677843 + 0.00000124431402*T
+		+ 6.2243475E-09*T2 - 3.7936096E-12*T2*T + 4.1635019/T)
+	return np.where(T>=273.15, water, ice)
+
+def dPws(T,kelvin=False):
+	"""
+	output: derivative of the saturation vapor pressure [Pa/K] for
+	input:
+		T: air temperature [°C or K] (dry bulb)
+		kelvin: True for Kelvin, False for Celsius
+	"""
+	return Pws(T,kelvin)*dlnPws(T,kelvin)
+
+def W(T,Tw,P,pws=None):
+	"""
+	output: humidity ratio [kg/kg] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		Tw: wet bulb temperature [°C]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	T = _array(T)
+	Tw = _array(Tw)
+	pws = (pws or Pws)(Tw)
+	Ws = 0.62198*pws / (P-pws)
+	warm = T>=0
+	a = np.where(warm, 2501-2.326*Tw, 2830-0.24*Tw)
+	b = np.where(warm, 2501+1.86*T-4.186*Tw, 2830+1.86*T-2.1*Tw)
+	return (a*Ws - 1.006*(T-Tw)) / b
+
+def W2(T,RH,P,pws=None):
+	"""
+	output: humidity ratio [kg/kg] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		RH: relative humidity [--%]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	pw = _array(RH)*(pws or Pws)(T)
+	return 0.62198*pw/(P-pw)
+
+def RH(T,Tw,P,pws=None):
+	"""
+	output: relative humidity [--%] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		Tw: wet bulb temperature [°C]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	return Pw(P,W(T,Tw,P,pws)) / (pws or Pws)(T)
+
+def RH2(T,W,P,pws=None):
+	"""
+	output: relative humidity [--%] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	return Pw(P,W) / (pws or Pws)(T)
+
+def Twb(T,RH,P,accuracy=0.00001,maxiter=100,pws=None):
+	"""
+	output: wet bulb temperature [°C] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		RH: relative humidity [--%]
+		P: air pressure [Pa]
+		accuracy: goal, relative on the humidity ratio or absolute
+			on the temperature step [K]
+		maxiter: iteration bound
+		pws: saturation pressure backend, e.g. pws_table.vector
+	Same safeguarded Newton-Rhapson as psicret.Twb, run on the whole
+	array at once; points drop out of the working set as they converge.
+	Points with a non-finite T, RH or P are NaN:
+		Twb([25,25],[nan,.5],101325)  ->  [nan, 17.889]
+	"""
+	T,RH,P = np.broadcast_arrays(_array(T),_array(RH),_array(P))
+	shape = T.shape
+	T = T.ravel()
+	P = P.ravel()
+	pws = pws or Pws
+	W0 = W2(T,RH.ravel(),P,pws)
+	warm = T>=0
+	a = np.where(warm,2501.0,2830.0)
+	b = np.where(warm,2.326,0.24)
+	c = np.where(warm,2501+1.86*T,2830+1.86*T)
+	d = np.where(warm,4.186,2.1)
+	lo = np.minimum(-100.0,T)
+	hi = T.copy()
+	valid = np.isfinite(W0) & np.isfinite(T) & np.isfinite(P)
+	t = np.where(valid,T,np.nan)
+	dx = hi-lo
+	idx = np.flatnonzero(valid)
+	for x in range(maxiter):
+		if not idx.size: break
+		ti,Ti,Pi,W0i = t[idx],T[idx],P[idx],W0[idx]
+		ai,bi,ci,di = a[idx],b[idx],c[idx],d[idx]
+		ps = pws(ti)
+		Ws = 0.62198*ps/(Pi-ps)
+		n = (ai-bi*ti)*Ws - 1.006*(Ti-ti)
+		D = ci-di*ti
+		f = n/D - W0i
+		done = np.abs(f) <= accuracy*W0i
+		above = f>0
+		hii = np.where(above,ti,hi[idx])
+		loi = np.where(above,lo[idx],ti)
+		dWs = 0.62198*Pi*ps*dlnPws(ti)/(Pi-ps)**2
+		m = ((ai-bi*ti)*dWs - bi*Ws + 1.006)*D + di*n
+		with np.errstate(divide='ignore',invalid='ignore'):
+			s = f*D*D/m
+		tn = ti-s
+		newton = (m>0) & (loi<tn) & (tn<hii) & (np.abs(2*s) <= np.abs(dx[idx]))
+		s = np.where(newton,s,0.5*(hii-loi))
+		tn = np.where(newton,tn,loi+s)
+		lo[idx] = loi
+		hi[idx] = hii
+		dx[idx] = s
+		t[idx[~done]] = tn[~done]
+		done|= np.abs(s) <= accuracy
+		idx = idx[~done]
+	return t.reshape(shape)[()]
+
+def h(T,W):
+	"""
+	output: enthalpy [kJ/kg] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+	"""
+	T = _array(T)
+	return 1.006*T + 1.86*T*W + 2501*W
+
+def T(h,W):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		h: enthalpy [kJ/kg]
+		W: humidity ratio [kg/kg]
+	"""
+	W = _array(W)
+	return (h - 2501*W) / (1.006 + 1.86*W)
+
+def T2(Tw,W,P,pws=None):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		Tw: wet bulb temperature [°C]
+		W: humidity ratio [kg/kg]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	Tw = _array(Tw)
+	W = _array(W)
+	ps = (pws or Pws)(Tw)
+	Ws = 0.62198*ps / (P-ps)
+	warm = ((2501-2.326*Tw)*Ws + 1.006*Tw - W*(2501-4.186*Tw)) / (1.006+1.86*W)
+	cold = ((2830-0.24*Tw)*Ws + 1.006*Tw - W*(2830-2.1*Tw)) / (1.006+1.86*W)
+	return np.where(warm<0, cold, warm)[()]
+
+def T3(Tw,RH,P,accuracy=0.00001,maxiter=100,pws=None):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		Tw: wet bulb temperature [°C]
+		RH: relative humidity [--%]
+		P: air pressure [Pa]
+		accuracy: goal on the temperature step [K]
+		maxiter: iteration bound
+		pws: saturation pressure backend, e.g. pws_table.vector
+	RH is taken as exactly 1 at T=Tw, as in psicret.T3.
+	"""
+	Tw,RH,P = np.broadcast_arrays(_array(Tw),_array(RH),_array(P))
+	shape = Tw.shape
+	Tw,RH,P = Tw.ravel(),RH.ravel(),P.ravel()
+	pws = pws or Pws
+	f = lambda t,i: np.where(t == Tw[i], 1.0, Pw(P[i],W(t,Tw[i],P[i],pws))/pws(t)) - RH[i]
+	return _illinois(f, Tw.copy(), T2(Tw,0.0,P,pws), accuracy, maxiter).reshape(shape)[()]
+
+def T4(Tw,h,P,pws=None):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		Tw: wet bulb temperature [°C]
+		h: enthalpy [kJ/kg]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	Same choice between the water and ice solutions as psicret.T4, and
+	NaN where neither is a state (T<Tw or RH out of 0..1); badly
+	conditioned for Tw close to 0°C.
+	"""
+	Tw = _array(Tw)
+	pws = pws or Pws
+	ps = pws(Tw)
+	Ws = 0.62198*ps / (P-ps)
+	with np.errstate(invalid='ignore',divide='ignore',over='ignore'):
+		Ww = ((2501-2.326*Tw)*Ws + 1.006*Tw - h) / (-4.186*Tw)
+		warm = T(h,Ww)
+		ok = (warm>=0) & (Ww >= -_SLACK)
+		ok&= Pw(P,Ww) <= (1+_SLACK)*pws(np.where(ok,warm,0.0))
+		Wi = ((2830-0.24*Tw)*Ws + 1.006*Tw - h) / (329-2.1*Tw)
+		cold = T(h,Wi)
+		valid = (cold >= Tw-_SLACK) & (Wi >= -_SLACK)
+		valid&= Pw(P,Wi) <= (1+_SLACK)*pws(np.where(valid,cold,0.0))
+	return np.where(ok, warm, np.where(valid, cold, np.nan))[()]
+
+def T5(RH,W,P,accuracy=0.00001,maxiter=50,pws=None):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		RH: relative humidity [--%]
+		W: humidity ratio [kg/kg]
+		P: air pressure [Pa]
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	return Tsat(Pw(P,W)/RH,accuracy,maxiter,pws)
+
+def T6(RH,h,P,accuracy=0.00001,maxiter=100,pws=None):
+	"""
+	output: air temperature [°C] (dry bulb) for
+	input:
+		RH: relative humidity [--%]
+		h: enthalpy [kJ/kg]
+		P: air pressure [Pa]
+		accuracy: goal on the temperature step [K]
+		maxiter: iteration bound
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	RH,H,P = np.broadcast_arrays(_array(RH),_array(h),_array(P))
+	shape = RH.shape
+	RH,H,P = RH.ravel(),H.ravel(),P.ravel()
+	pws = pws or Pws
+	hi = H/1.006
+	with np.errstate(over='ignore',invalid='ignore'):
+		wet = RH*pws(hi) > 0.99*P
+	if wet.any():
+		hi[wet] = Tsat(0.99*P[wet]/RH[wet],pws=pws)
+	def f(t,i):
+		w = W2(t,RH[i],P[i],pws)
+		return 1.006*t + (2501+1.86*t)*w - H[i]
+	return _illinois(f, np.minimum(-100.0,hi-1), hi, accuracy, maxiter).reshape(shape)[()]
+
+def Tsat(ps,accuracy=0.00001,maxiter=50,pws=None):
+	"""
+	output: saturation temperature [°C] for
+	input:
+		ps: saturation vapor pressure [Pa]
+		accuracy: goal on the temperature step [K]
+		maxiter: iteration bound
+		pws: saturation pressure backend, e.g. pws_table.vector
+	"""
+	ps = _array(ps)
+	shape = ps.shape
+	pws = pws or Pws
+	with np.errstate(invalid='ignore',divide='ignore'):
+		lp = np.log(ps).ravel()
+		a = lp - np.log(611.2)
+		t = 243.12*a/(17.62-a)
+	idx = np.flatnonzero(np.isfinite(t))
+	for x in range(maxiter):
+		if not idx.size: break
+		ti = t[idx]
+		s = (np.log(pws(ti)) - lp[idx])/dlnPws(ti)
+		t[idx] = ti-s
+		idx = idx[np.abs(s) > accuracy]
+	return t.reshape(shape)[()]
+
+def _illinois(f, lo, hi, accuracy, maxiter):
+	'''Same Illinois iteration as psicret._illinois on whole arrays;
+	f(t, idx) evaluates the rows idx at t.  NaN where f does not change
+	sign over [lo,hi].'''
+	n = lo.size
+	rows = np.arange(n)
+	with np.errstate(invalid='ignore'):
+		flo = f(lo,rows)
+		fhi = f(hi,rows)
+		idx = np.flatnonzero(flo*fhi <= 0)
+	t = np.full(n,np.nan)
+	t[idx] = lo[idx]
+	side = np.zeros(n,dtype=int)
+	for x in range(maxiter):
+		if not idx.size: break
+		loi,hii,floi,fhii,sidei = lo[idx],hi[idx],flo[idx],fhi[idx],side[idx]
+		flat = fhii == floi
+		with np.errstate(invalid='ignore',divide='ignore'):
+			ti = np.where(flat, t[idx], (loi*fhii - hii*floi)/(fhii - floi))
+		ft = f(ti,idx)
+		up = (ft>0) == (fhii>0)
+		hi[idx] = np.where(up,ti,hii)
+		fhi[idx] = np.where(up,ft,np.where(sidei>0,0.5*fhii,fhii))
+		lo[idx] = np.where(up,loi,ti)
+		flo[idx] = np.where(up,np.where(sidei<0,0.5*floi,floi),ft)
+		side[idx] = np.where(up,-1,1)
+		done = flat | (ft == 0) | (np.abs(ti-t[idx]) <= accuracy)
+		t[idx] = ti
+		idx = idx[~done]
+	return t
+
+def W3(T,h):
+	"""
+	output: humidity ratio [kg/kg] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		h: enthalpy [kJ/kg]
+	"""
+	T = _array(T)
+	return (h - 1.006*T) / (2501 + 1.86*T)
+
+def Dew(P,W):
+	"""
+	output: Dew point temperature [°C] for
+	input:
+		P: air pressure [Pa]
+		W: humidity ratio [kg/kg]
+	"""
+	pw = Pw(P,W)
+	a = np.log(pw/1125)
+	a2 = a*a
+	d = 6.54 + 14.526*a + 0.7389*a2 + 0.09486*a2*a + 0.4569*pw**0.1984
+	return np.where(d>0, d, 6.09 + 12.608*a + 0.4959*a2)
+
+def Rda(P,T,W,kelvin=False):
+	"""
+	output: density of dry air [kg/m³] for
+	input:
+		P: air pressure [Pa]
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+	"""
+	T = _array(T)
+	if not kelvin:
+		T = T + 273.15
+	R = 287.055
+	return P/(R*T*(1+_array(W)/0.62198))
+
+def Sv(P,T,W,kelvin=False):
+	"""
+	output: specific volume [m³/kg dry air] for
+	input:
+		P: air pressure [Pa]
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+	"""
+	return 1/Rda(P,T,W,kelvin)
+
+def Mad(P,T,W,kelvin=False):
+	"""
+	output: moist air density [kg/m³] for
+	input:
+		P: air pressure [Pa]
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+	"""
+	return Rda(P,T,W,kelvin)*(1+_array(W))
+
+def Dsat(T,W,P,pws=None):
+	"""
+	output: degree of saturation [--%] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+		P: air pressure [Pa]
+	"""
+	pws = (pws or Pws)(T)
+	return W*(P-pws)/(0.62198*pws)
+
+def S(T,W,P):
+	"""
+	output: entropy [kJ/(kg·K), per kg of dry air] for
+	input:
+		T: air temperature [°C] (dry bulb)
+		W: humidity ratio [kg/kg]
+		P: air pressure [Pa]
+	"""
+	W = _array(W)
+	lnT = np.log(_array(T)/273.15+1)
+	pw = Pw(P,W)
+	s = 1.006*lnT - 0.287055*np.log((P-pw)/101325)
+	dry = W <= 0
+	with np.errstate(divide='ignore',invalid='ignore'):
+		vapor = W*(2501/273.15 + 1.86*lnT - 0.46152*np.log(pw/611.2))
+	return s + np.where(dry,0.0,vapor)
+
+INPUTS = ('tdb','twb','dew','rh','W','h')
+OUTPUTS = ('tdb','twb','dew','rh','W','h','pw','dsat','sv','mad','s','P')
+_ALIASES = {'ratio':'W', 'enthalpy':'h', 'pressure':'P'}
+
+def solve_table(columns,pws=None):
+	"""
+	output: dict of contiguous arrays, one per name in OUTPUTS:
+		tdb, twb, dew [°C], rh [--%], W [kg/kg], h [kJ/kg],
+		pw: vapor pressure [Pa]
+		dsat: degree of saturation [--%]
+		sv: specific volume [m³/kg dry air]
+		mad: moist air density [kg/m³]
+		s: entropy [kJ/(kg·K), per kg of dry air]
+		P: air pressure [Pa]
+	input:
+		columns: mapping of column name to array (SI units) holding any
+			two of tdb, twb, dew, rh, W (ratio), h (enthalpy) per row
+			(but not dew and W, which are not independent),
+			NaN where unknown, plus P (pressure) or elevation [m]
+			as a column or a scalar
+		pws: saturation pressure backend, e.g. pws_table.vector
+	Rows are grouped by the set of properties they know, and every
+	group is solved as a vector.  Rows that cannot be solved are NaN,
+	and so are rows that know more than two properties, which could
+	contradict each other.
+	"""
+	cols = {}
+	for name, value in columns.items():
+		cols[_ALIASES.get(name,name)] = _array(value)
+	n = max([c.size for c in cols.values()] or [0])
+	P = cols.pop('P',None)
+	if P is None:
+		P = mean_pressure(cols.pop('elevation',None))
+	P = np.broadcast_to(_array(P),(n,))
+	known = np.zeros(n,dtype=int)
+	for bit, name in enumerate(INPUTS):
+		if name in cols:
+			cols[name] = np.broadcast_to(cols[name],(n,))
+			known|= ~np.isnan(cols[name]) << bit
+	out = {}
+	for name in OUTPUTS:
+		out[name] = np.empty(n)
+	out['P'][:] = P
+	pws = pws or Pws
+	with np.errstate(invalid='ignore',divide='ignore'):
+		for code in np.unique(known):
+			idx = np.flatnonzero(known==code)
+			if bin(code).count('1') > 2:
+				for name in OUTPUTS[:-1]:
+					out[name][idx] = np.nan
+				continue
+			got = dict((name, cols[name][idx])
+				for bit, name in enumerate(INPUTS) if code>>bit & 1)
+			_solve_group(got, P[idx], pws)
+			for name in OUTPUTS[:-1]:
+				out[name][idx] = got[name]
+	return out
+
+def _solve_group(got, P, pws):
+	nan = np.full(P.shape,np.nan)
+	tdb = got.get('tdb')
+	if tdb is None:
+		if 'dew' in got and 'W' not in got:
+			pds = pws(got['dew'])
+			got['W'] = 0.621945*pds/(P-pds)
+		if 'h' in got and 'W' in got:
+			tdb = T(got['h'],got['W'])
+		elif 'twb' in got and 'W' in got:
+			tdb = T2(got['twb'],got['W'],P,pws)
+		elif 'rh' in got and 'W' in got:
+			tdb = T5(got['rh'],got['W'],P,pws=pws)
+		elif 'twb' in got and 'h' in got:
+			tdb = T4(got['twb'],got['h'],P,pws)
+		elif 'twb' in got and 'rh' in got:
+			tdb = T3(got['twb'],got['rh'],P,pws=pws)
+		elif 'rh' in got and 'h' in got:
+			tdb = T6(got['rh'],got['h'],P,pws=pws)
+		else:
+			tdb = nan
+	got['tdb'] = tdb
+	if 'W' not in got:
+		if 'twb' in got:
+			got['W'] = W(tdb,got['twb'],P,pws)
+		elif 'dew' in got:
+			pds = pws(got['dew'])
+			got['W'] = 0.621945*pds/(P-pds)
+		elif 'rh' in got:
+			got['W'] = W2(tdb,got['rh'],P,pws)
+		elif 'h' in got:
+			got['W'] = W3(tdb,got['h'])
+		else:
+			got['W'] = nan
+	w = got['W']
+	if 'h' not in got:
+		got['h'] = h(tdb,w)
+	if 'rh' not in got:
+		if 'twb' in got:
+			got['rh'] = RH(tdb,got['twb'],P,pws)
+		elif 'dew' in got:
+			got['rh'] = pws(got['dew'])/pws(tdb)
+		else:
+			got['rh'] = RH2(tdb,w,P,pws)
+	pw = Pw(P,w)
+	got['pw'] = pw
+	if 'dew' not in got:
+		got['dew'] = Dew(P,w)
+	if 'twb' not in got:
+		got['twb'] = Twb(tdb,got['rh'],P,pws=pws)
+	got['dsat'] = Dsat(tdb,w,P,pws)
+	rda = Rda(P,tdb,w)
+	got['sv'] = 1/rda
+	got['mad'] = rda*(1+w)
+	got['s'] = S(tdb,w,P)
+
+class state_table:
+	'''Struct-of-arrays container of solved states, e.g. the output of
+	solve_table: one contiguous float column per property, about 56 bytes
+	per state.  Indexing returns a solved_state.'''
+	def __init__(self, columns):
+		self.columns = dict((name, np.ascontiguousarray(columns[name],dtype=float))
+			for name in solved_state.__slots__)
+
+	def __len__(self):
+		return len(self.columns['P'])
+
+	def __getitem__(self, i):
+		return solved_state(*[float(self.columns[name][i]) for name in solved_state.__slots__])
+
+	def nbytes(self):
+		return sum(c.nbytes for c in self.columns.values())
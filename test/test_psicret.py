@@ -0,0 +1,157 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+'''
+ Regression checks of the fast paths against the reference ones:
+ vpsicret against psicret, solve_table against solveall, the compiled
+ argument parser against the regex one, and parallel solves against
+ serial ones, with NaN inputs along.
+
+	cd test && python -m unittest discover
+ '''
+
+import os
+import sys
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','lib'))
+
+import math
+import warnings
+import unittest
+import numpy as np
+import psicret as module
+import vpsicret
+import parallel
+from psicret import psicret
+from pwstable import pws_table
+from instrument import collector
+from arguments import args, HELP
+
+P = 101325.0
+NAN = float('nan')
+
+def _states():
+	'''(tdb, rh) pairs over the range of the chart, ice side included'''
+	return [(t+0.3, r) for t in range(-30,60,3) for r in (0.0,0.05,0.3,0.7,1.0)]
+
+def _same(a, b, tol):
+	'''Equal within tol, relative to the larger magnitude above 1'''
+	if a != a or b != b:
+		return a != a and b != b
+	return abs(a-b) <= tol*max(1.0,abs(a),abs(b))
+
+class vector_test(unittest.TestCase):
+	def setUp(self):
+		warnings.simplefilter('ignore')
+		self.T = np.array([t for t, r in _states()])
+		self.RH = np.array([r for t, r in _states()])
+
+	def check(self, name, fn, vfn, columns, tol=1e-9):
+		got = vfn(*columns)
+		for i, row in enumerate(zip(*columns)):
+			self.assertTrue(_same(fn(*row),got[i],tol),
+				'%s%r: %r vs %r' % (name,row,fn(*row),got[i]))
+
+	def test_functions(self):
+		T, RH = self.T, self.RH
+		W = vpsicret.W2(T,RH,P)
+		Tw = vpsicret.Twb(T,RH,P)
+		h = vpsicret.h(T,W)
+		Ps = np.repeat(P,len(T))
+		self.check('Pws', psicret.Pws, vpsicret.Pws, (T,))
+		self.check('W2', psicret.W2, vpsicret.W2, (T,RH,Ps))
+		self.check('Twb', psicret.Twb, vpsicret.Twb, (T,RH,Ps), 1e-6)
+		self.check('h', psicret.h, vpsicret.h, (T,W))
+		self.check('T', psicret.T, vpsicret.T, (h,W))
+		self.check('T2', psicret.T2, vpsicret.T2, (Tw,W,Ps), 1e-6)
+		self.check('T4', psicret.T4, vpsicret.T4, (Tw,h,Ps), 1e-6)
+		wet = RH > 0
+		self.check('T3', psicret.T3, vpsicret.T3, (Tw[wet],RH[wet],Ps[wet]), 1e-6)
+		self.check('T5', psicret.T5, vpsicret.T5, (RH[wet],W[wet],Ps[wet]), 1e-6)
+		self.check('T6', psicret.T6, vpsicret.T6, (RH[wet],h[wet],Ps[wet]), 1e-6)
+		self.check('Dew', psicret.Dew, vpsicret.Dew, (Ps[wet],W[wet]), 1e-6)
+
+	def test_nan(self):
+		for fn in (lambda t: psicret.Twb(t,.5,P), lambda t: vpsicret.Twb(t,.5,P),
+				lambda t: psicret.W2(t,.5,P), lambda t: vpsicret.W2(t,.5,P)):
+			self.assertTrue(math.isnan(fn(NAN)))
+		self.assertTrue(np.isnan(vpsicret.Twb([25.0,NAN],[NAN,.5],P)).all())
+
+	def test_T4_inconsistent(self):
+		for Tw, h in ((17,45),(10,50),(5,30)):
+			self.assertTrue(math.isnan(psicret.T4(Tw,h,P)))
+			self.assertTrue(math.isnan(vpsicret.T4(Tw,h,P)))
+
+class table_test(unittest.TestCase):
+	def setUp(self):
+		warnings.simplefilter('ignore')
+
+	def test_solveall(self):
+		states = [(t,r) for t, r in _states() if r > 0]
+		columns = {'tdb': np.array([t for t, r in states]),
+			'rh': np.array([r for t, r in states]), 'P': P}
+		solved = vpsicret.solve_table(columns)
+		for i, (t, r) in enumerate(states):
+			state = psicret('si',P=P,tdb=t,rh=r).solveall(record=True)
+			for name in ('twb','dew','W','h'):
+				self.assertTrue(_same(getattr(state,name),solved[name][i],1e-6),
+					'%s at %r' % (name,(t,r)))
+
+	def test_nan_rows(self):
+		solved = vpsicret.solve_table({'tdb': np.array([25.0,NAN]),
+			'rh': np.array([.5,.5]), 'P': P})
+		self.assertFalse(math.isnan(solved['W'][0]))
+		self.assertTrue(math.isnan(solved['W'][1]))
+
+	def test_parallel(self):
+		n = 1000
+		columns = {'tdb': np.linspace(-20,50,n), 'rh': np.linspace(0,1,n), 'P': P}
+		columns['tdb'][7] = NAN
+		serial = vpsicret.solve_table(columns)
+		try:
+			for solved in (parallel.solve_table(columns,2,shard=100),
+					parallel.solve_table_threads(columns,2,shard=100)):
+				for name in vpsicret.OUTPUTS:
+					np.testing.assert_array_equal(solved[name],serial[name])
+		finally:
+			parallel.close()
+
+class pws_test(unittest.TestCase):
+	def test_table(self):
+		table = pws_table()
+		for t in (-100.0,-20.3,0.0,25.0,199.9,250.0):
+			self.assertTrue(_same(table(t),psicret.Pws(t),1e-6))
+		self.assertTrue(math.isnan(table(NAN)))
+		self.assertTrue(np.isnan(table.vector([NAN]))[0])
+
+	def test_probe(self):
+		'''An installed collector does not change the result of a solve'''
+		plain = psicret.Twb(NAN,.5,P), psicret.Twb(25,.5,P,maxiter=0)
+		module.set_probe(collector())
+		try:
+			probed = psicret.Twb(NAN,.5,P), psicret.Twb(25,.5,P,maxiter=0)
+		finally:
+			module.set_probe(None)
+		self.assertTrue(math.isnan(probed[0]) and math.isnan(plain[0]))
+		self.assertEqual(probed[1],plain[1])
+
+class arguments_test(unittest.TestCase):
+	def parser(self, compiled):
+		cli = args(HELP, compiled=compiled)
+		cli.rflags('si','english','stream')
+		cli.rkeys(pressure=None, dbt=None, relative=None, chunk=None)
+		cli.ralias(m='si', i='english', P='pressure', t='dbt', p='relative')
+		return cli
+
+	def test_compiled(self):
+		for argv in (['-P','101.325','-t','25','-p','50'],
+				['-i','--dbt=77','--relative=50','title'],
+				['--stream','--chunk=100','-mP','90'],
+				['25','60','free text','--unknown']):
+			plain, compiled = self.parser(False), self.parser(True)
+			plain.parse(argv)
+			compiled.parse(argv)
+			self.assertEqual(compiled.tree(),plain.tree(),argv)
+			self.assertEqual(compiled.free(),plain.free(),argv)
+
+if __name__ == '__main__':
+	unittest.main()